@@ -0,0 +1,23 @@
+import ast
+import os
+
+from harness import ROOT
+
+APP = os.path.join(ROOT, "streamlit_RRG_Advanced.py")
+
+
+def load_app_functions(path=APP):
+    # Execute the app's imports, constants and function definitions without the
+    # page itself (st.set_page_config and everything from st.title onwards).
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    body = []
+    for node in tree.body:
+        source = ast.unparse(node)
+        if isinstance(node, ast.Expr) and source.startswith("st.title"):
+            break
+        if isinstance(node, ast.Expr) and source.startswith("st.set_page_config"):
+            continue
+        body.append(node)
+    namespace = {"__name__": "rrg_app", "__file__": path}
+    exec(compile(ast.Module(body, type_ignores=[]), path, "exec"), namespace)
+    return namespace
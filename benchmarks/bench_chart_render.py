@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_loader import load_app_functions
+from fake_data import synthetic_prices
+
+
+def measure(create_rrg_chart, data, sectors, tail_length, fast_render, repeat):
+    best_build = best_json = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = create_rrg_chart(data, "BENCH", sectors, {}, "Screener List", "Daily", tail_length, fast_render=fast_render)
+        built = time.perf_counter()
+        payload = fig.to_json()
+        serialized = time.perf_counter()
+        best_build = min(best_build, built - start)
+        best_json = min(best_json, serialized - built)
+    return len(fig.data), len(payload), best_build, best_json
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plotly payload size and build/serialize time, standard vs fast render")
+    parser.add_argument("--sizes", default="20,72,300,1000")
+    parser.add_argument("--tail-length", type=int, default=52)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    create_rrg_chart = load_app_functions()["create_rrg_chart"]
+    print(f"{'tickers':>8} {'mode':>9} {'traces':>7} {'json KB':>9} {'build s':>8} {'json s':>8}")
+    for n_tickers in [int(size) for size in args.sizes.split(",")]:
+        data = synthetic_prices(n_tickers, 500)
+        sectors = list(data.columns[1:])
+        for label, fast_render in (("standard", False), ("fast", True)):
+            traces, size, build, serialize = measure(create_rrg_chart, data, sectors, args.tail_length, fast_render, args.repeat)
+            print(f"{n_tickers:>8} {label:>9} {traces:>7} {size / 1024:>9.1f} {build:>8.3f} {serialize:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from check_incremental import main as check_incremental
+from fake_data import synthetic_prices
+from rrg_core import compute_rrg_frame
+from rrg_incremental import IncrementalRRGBook
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental RRG update vs full batch recompute")
+    parser.add_argument("--tickers", type=int, default=72)
+    parser.add_argument("--periods", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if check_incremental():
+        return 1
+    data = synthetic_prices(args.tickers, args.periods + 1)
+    sectors = list(data.columns[1:])
+
+    book = IncrementalRRGBook()
+    book.update(data.iloc[:-1], "BENCH", sectors, "Daily")
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        compute_rrg_frame(data, "BENCH", sectors)
+        timings.append(time.perf_counter() - start)
+    batch_time = min(timings)
+    start = time.perf_counter()
+    book.update(data, "BENCH", sectors, "Daily")
+    incremental_time = time.perf_counter() - start
+    print(f"{args.tickers} tickers x {args.periods} bars: full batch {batch_time:.4f}s, "
+          f"one new bar incremental {incremental_time:.4f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import argparse
+import logging
+import os
+import resource
+import subprocess
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_data import synthetic_prices
+from rrg_cache import RRGResultCache
+from rrg_core import compute_rrg_frame, resample_prices
+from ticker_cache import TickerCache
+from universe_cache import UniverseCache, compact_frame, frame_nbytes
+
+
+class FrameSource:
+    # Stands in for the PriceStore: closes sliced out of one synthetic matrix
+    def __init__(self, closes):
+        self.closes = closes
+
+    def get_closes(self, tickers, start, end):
+        return self.closes[[t for t in tickers if t in self.closes.columns]]
+
+
+def session_universes(pool, sessions, tickers_per_session, seed=1):
+    # Every session brings its own custom ticker list, all drawn from one pool
+    rng = np.random.default_rng(seed)
+    return [list(rng.choice(pool, size=tickers_per_session, replace=False)) for _ in range(sessions)]
+
+
+def legacy_sessions(closes, universes, timeframe):
+    # The old path: float64 closes under @st.cache_data (a pickled copy per entry,
+    # unpickled again for each caller), dropna, resample and a float64 RRG frame.
+    import streamlit as st
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").setLevel(logging.ERROR)
+
+    @st.cache_data
+    def get_data(tickers):
+        return closes[["BENCH"] + list(tickers)].dropna(axis=1, how="all")
+
+    held = []
+    for tickers in universes:
+        data = get_data(tuple(tickers))
+        sectors = [t for t in tickers if t in data.columns]
+        held.append((data, compute_rrg_frame(resample_prices(data, timeframe), "BENCH", sectors)))
+    return held
+
+
+def compact_sessions(closes, universes, timeframe, budget_mb):
+    # The new path: shared float32 ticker cache -> shared read-only universe frames
+    # under a byte budget -> float32 RRG results.
+    ticker_cache = TickerCache(FrameSource(closes))
+    universe_cache = UniverseCache(max_bytes=int(budget_mb * 1024 * 1024))
+    rrg_cache = RRGResultCache()
+    end = closes.index[-1].to_pydatetime()
+    start = closes.index[0].to_pydatetime()
+
+    held = []
+    for tickers in universes:
+        key = tuple(tickers)
+        data = universe_cache.get(key)
+        if data is None:
+            data = compact_frame(ticker_cache.get_closes(["BENCH"] + tickers, start, end).dropna(axis=1, how="all"))
+            universe_cache.put(key, data, frame_nbytes(data))
+        sectors = [t for t in tickers if t in data.columns]
+        held.append((data, rrg_cache.compute_frame(resample_prices(data, timeframe), "BENCH", sectors, timeframe)))
+    return held, universe_cache.stats()
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(args):
+    closes = synthetic_prices(args.pool, args.periods)
+    pool = list(closes.columns[1:])
+    universes = session_universes(pool, args.sessions, args.tickers)
+    baseline = peak_rss_mb()
+    if args.mode == "legacy":
+        held = legacy_sessions(closes, universes, args.timeframe)
+        extra = ""
+    else:
+        held, stats = compact_sessions(closes, universes, args.timeframe, args.budget_mb)
+        extra = f"  universe cache {stats['bytes'] / 1e6:.1f} MB, {stats['evictions']} evictions"
+    peak = peak_rss_mb()
+    print(f"{args.mode:>8}: peak RSS {peak:8.1f} MB (+{peak - baseline:.1f} MB over the loaded price pool),"
+          f" {len(held)} sessions{extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of many sessions with different custom universes, old vs compact path")
+    parser.add_argument("--mode", choices=["legacy", "compact"], help="run one mode in this process (used internally)")
+    parser.add_argument("--pool", type=int, default=3000, help="tickers to draw custom universes from")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--tickers", type=int, default=300, help="tickers per custom universe")
+    parser.add_argument("--periods", type=int, default=500)
+    parser.add_argument("--timeframe", choices=["Weekly", "Daily"], default="Daily")
+    parser.add_argument("--budget-mb", type=float, default=256)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+    # Each mode in a fresh interpreter, so neither inherits the other's peak
+    print(f"{args.sessions} sessions x {args.tickers} tickers from a pool of {args.pool}, {args.periods} bars, {args.timeframe}")
+    for mode in ("legacy", "compact"):
+        subprocess.run([sys.executable, __file__, "--mode", mode] + sys.argv[1:], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app_loader import load_app_functions
+from downloader import Downloader
+from fake_data import CannedPrices, synthetic_prices
+from rrg_core import DEFAULT_WINDOWS, compute_rrg_frame, resample_prices
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pipeline_baseline.json")
+STAGES = ["fetch", "resample", "rrg", "rrg_legacy", "boundary", "figure", "json"]
+# Roughly what lookback_start() downloads: 500 calendar days / 100 weeks of business days
+PERIODS = {"Daily": 357, "Weekly": 500}
+TAIL_LENGTH = 5
+
+
+def calculate_rrg_values(data, benchmark, windows=DEFAULT_WINDOWS):
+    # The app's old single-series path, timed as "rrg_legacy" next to the batched engine
+    aligned_data = pd.concat([data, benchmark], axis=1).dropna()
+
+    data = aligned_data.iloc[:, 0]
+    benchmark = aligned_data.iloc[:, 1]
+
+    rs_short, rs_long, rm_short, rm_long = windows
+    sbr = data / benchmark
+    rs1 = ma(sbr, rs_short)
+    rs2 = ma(sbr, rs_long)
+    rs = 100 * ((rs1 - rs2) / rs2 + 1)
+    rm1 = ma(rs, rm_short)
+    rm2 = ma(rs, rm_long)
+    rm = 100 * ((rm1 - rm2) / rm2 + 1)
+
+    return rs, rm
+
+
+def ma(data, period):
+    return data.rolling(window=period).mean()
+
+
+def median_of(repeat, func):
+    # Median rather than best-of: one lucky or unlucky run moves neither the
+    # baseline nor the check. As in timeit, collections are kept out of the timings.
+    timings, result = [], None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - started)
+        finally:
+            gc.enable()
+    return statistics.median(timings), result
+
+
+def reference_workload():
+    # Fixed numpy / pandas / pure-Python work that does not touch the app code.
+    # It is timed with every run so the baseline can be scaled to how fast this
+    # machine is right now (CPU frequency, other load) before comparing stages.
+    rng = np.random.default_rng(0)
+    pd.DataFrame(rng.random((2000, 50))).rolling(20).mean().sum()
+    np.sort(rng.random(200_000))
+    json.dumps([float(value) for value in rng.random(20_000)])
+
+
+def load_fixture(path):
+    # Recorded close matrix (csv or parquet), dates as index, benchmark first
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def run_pipeline(app, closes, timeframe, repeat, legacy_max):
+    # Times every stage of get_data -> create_rrg_chart -> st.plotly_chart on one
+    # universe. Each stage gets the previous stage's output, so they add up to a page load.
+    benchmark, sectors = closes.columns[0], list(closes.columns[1:])
+    fake_download = CannedPrices(closes)
+    download = Downloader(fake_download, sleep=lambda seconds: None)
+    timings = {}
+
+    timings["fetch"], data = median_of(repeat, lambda: download(list(closes.columns), closes.index[0], closes.index[-1]))
+    timings["resample"], resampled = median_of(repeat, lambda: resample_prices(data, timeframe))
+    timings["rrg"], rrg_data = median_of(repeat, lambda: compute_rrg_frame(resampled, benchmark, sectors))
+    if len(sectors) <= legacy_max:
+        timings["rrg_legacy"], _ = median_of(repeat, lambda: [
+            calculate_rrg_values(resampled[sector], resampled[benchmark]) for sector in sectors
+        ])
+
+    def boundary():
+        boundary_data = rrg_data.iloc[-max(6, TAIL_LENGTH):]
+        return app["chart_ranges"](
+            boundary_data.xs("RS-Ratio", axis=1, level=1).to_numpy(),
+            boundary_data.xs("RS-Momentum", axis=1, level=1).to_numpy()
+        )
+
+    timings["boundary"], _ = median_of(repeat, boundary)
+    timings["figure"], fig = median_of(repeat, lambda: app["create_rrg_chart"](
+        data, benchmark, sectors, {}, "Screener List", timeframe, TAIL_LENGTH, rrg_data=rrg_data
+    ))
+    timings["json"], payload = median_of(repeat, fig.to_json)
+    return timings, len(payload)
+
+
+def check(results, baseline, tolerance, min_delta, scale=1.0):
+    # A stage regresses when it is both `tolerance` slower (relative) and
+    # `min_delta` seconds slower (absolute) than its baseline times `scale`,
+    # so sub-millisecond noise never fails.
+    failures = []
+    for key, seconds in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        previous *= scale
+        if seconds > previous * (1 + tolerance) and seconds - previous > min_delta:
+            failures.append(f"{key}: {seconds:.4f}s vs baseline {previous:.4f}s (+{seconds / previous - 1:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage timings of the data -> RRG -> chart pipeline, checked against a baseline")
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    parser.add_argument("--timeframes", default="Daily,Weekly")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--legacy-max", type=int, default=1000, help="largest universe to time calculate_rrg_values on")
+    parser.add_argument("--fixture", help="recorded close matrix (.csv/.parquet, benchmark first) instead of synthetic prices")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="write these timings as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown per stage")
+    parser.add_argument("--min-delta", type=float, default=0.01, help="ignore slowdowns smaller than this many seconds")
+    args = parser.parse_args(argv)
+
+    app = load_app_functions()
+    reference, _ = median_of(args.repeat, reference_workload)
+    fixture = load_fixture(args.fixture) if args.fixture else None
+    results = {}
+    print(f"{'timeframe':>9} {'tickers':>8} " + " ".join(f"{stage:>10}" for stage in STAGES) + f" {'json KB':>9}")
+    for timeframe in args.timeframes.split(","):
+        for n_tickers in [int(size) for size in args.sizes.split(",")]:
+            if fixture is not None:
+                closes = fixture.iloc[:, :n_tickers + 1]
+                n_tickers = closes.shape[1] - 1
+            else:
+                closes = synthetic_prices(n_tickers, PERIODS[timeframe])
+            timings, payload_size = run_pipeline(app, closes, timeframe, args.repeat, args.legacy_max)
+            for stage, seconds in timings.items():
+                results[f"{timeframe}/{n_tickers}/{stage}"] = seconds
+            cells = " ".join(f"{timings[stage]:>10.4f}" if stage in timings else f"{'-':>10}" for stage in STAGES)
+            print(f"{timeframe:>9} {n_tickers:>8} {cells} {payload_size / 1024:>9.1f}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine": platform.node(),
+                "python": platform.python_version(),
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "reference": reference,
+                "timings": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine") != platform.node():
+        print(f"Note: baseline was recorded on {baseline.get('machine')}, timings may not be comparable")
+    # Older baselines have no reference timing and are compared unscaled
+    scale = reference / baseline["reference"] if baseline.get("reference") else 1.0
+    print(f"Reference workload {reference:.4f}s, baseline scaled by {scale:.2f}")
+    failures = check(results, baseline["timings"], args.tolerance, args.min_delta, scale)
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    print(f"{len(results) - len(failures)}/{len(results)} stage timings within {args.tolerance:.0%} of the baseline")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_data import synthetic_prices
+from rrg_cache import RRGResultCache
+from rrg_core import compute_rrg_frame
+
+
+def decorated_path():
+    # calculate_rrg_values / ma as they were, under @st.cache_data
+    import streamlit as st
+
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    @st.cache_data
+    def ma(data, period):
+        return data.rolling(window=period).mean()
+
+    @st.cache_data
+    def calculate_rrg_values(data, benchmark):
+        aligned_data = pd.concat([data, benchmark], axis=1).dropna()
+        data = aligned_data.iloc[:, 0]
+        benchmark = aligned_data.iloc[:, 1]
+        sbr = data / benchmark
+        rs1 = ma(sbr, 10)
+        rs2 = ma(sbr, 26)
+        rs = 100 * ((rs1 - rs2) / rs2 + 1)
+        rm1 = ma(rs, 1)
+        rm2 = ma(rs, 4)
+        rm = 100 * ((rm1 - rm2) / rm2 + 1)
+        return rs, rm
+
+    def run(data, sectors):
+        return [calculate_rrg_values(data[sector], data["BENCH"]) for sector in sectors]
+
+    return run, st.cache_data.clear
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="@st.cache_data path vs RRGResultCache, cold and warm")
+    parser.add_argument("--tickers", type=int, default=72)
+    parser.add_argument("--periods", type=int, default=500)
+    args = parser.parse_args()
+
+    data = synthetic_prices(args.tickers, args.periods)
+    sectors = list(data.columns[1:])
+
+    cache = RRGResultCache()
+    np.testing.assert_allclose(cache.compute_frame(data, "BENCH", sectors, "Daily").to_numpy(),
+                               compute_rrg_frame(data, "BENCH", sectors).to_numpy(), rtol=1e-6, equal_nan=True)
+    cache = RRGResultCache()
+
+    run_decorated, clear_decorated = decorated_path()
+    clear_decorated()
+    decorated_cold = timed(lambda: run_decorated(data, sectors))
+    decorated_warm = timed(lambda: run_decorated(data, sectors))
+    cache_cold = timed(lambda: cache.compute_frame(data, "BENCH", sectors, "Daily"))
+    cache_warm = timed(lambda: cache.compute_frame(data, "BENCH", sectors, "Daily"))
+
+    print(f"{args.tickers} tickers x {args.periods} bars")
+    print(f"  @st.cache_data   cold {decorated_cold:.4f}s  warm {decorated_warm:.4f}s")
+    print(f"  RRGResultCache   cold {cache_cold:.4f}s  warm {cache_warm:.4f}s  {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_data import synthetic_prices
+from rrg_core import compute_rrg_frame
+
+
+def legacy_rrg(data, benchmark, sectors):
+    # The per-ticker loop create_rrg_chart used before the batched engine
+    # (without the st.cache_data hashing on top, so this understates the old cost).
+    def ma(series, period):
+        return series.rolling(window=period).mean()
+
+    rrg_data = pd.DataFrame()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+        for sector in sectors:
+            _legacy_insert(rrg_data, data, benchmark, sector, ma)
+    return rrg_data
+
+
+def _legacy_insert(rrg_data, data, benchmark, sector, ma):
+    aligned = pd.concat([data[sector], data[benchmark]], axis=1).dropna()
+    sbr = aligned.iloc[:, 0] / aligned.iloc[:, 1]
+    rs1 = ma(sbr, 10)
+    rs2 = ma(sbr, 26)
+    rs = 100 * ((rs1 - rs2) / rs2 + 1)
+    rm = 100 * ((ma(rs, 1) - ma(rs, 4)) / ma(rs, 4) + 1)
+    rrg_data[f"{sector}_RS-Ratio"] = rs
+    rrg_data[f"{sector}_RS-Momentum"] = rm
+
+
+def check_equivalence(data, sectors):
+    batched = compute_rrg_frame(data, "BENCH", sectors)
+    for sector in sectors:
+        aligned = pd.concat([data[sector], data["BENCH"]], axis=1).dropna()
+        single = legacy_rrg(aligned, "BENCH", [sector])
+        for field in ("RS-Ratio", "RS-Momentum"):
+            expected = single[f"{sector}_{field}"]
+            actual = batched[(sector, field)].reindex(expected.index)
+            np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), rtol=1e-10, atol=1e-10, equal_nan=True)
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-ticker loop vs batched RRG engine")
+    parser.add_argument("--sizes", default="20,100,500,2000")
+    parser.add_argument("--periods", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    check_equivalence(synthetic_prices(20, args.periods), [f"T{i:04d}" for i in range(20)])
+    print("equivalence check passed")
+    print(f"{'tickers':>8} {'loop (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for n_tickers in [int(size) for size in args.sizes.split(",")]:
+        data = synthetic_prices(n_tickers, args.periods)
+        sectors = list(data.columns[1:])
+        loop_time = best_of(lambda: legacy_rrg(data, "BENCH", sectors), args.repeat)
+        batched_time = best_of(lambda: compute_rrg_frame(data, "BENCH", sectors), args.repeat)
+        print(f"{n_tickers:>8} {loop_time:>10.4f} {batched_time:>12.4f} {loop_time / batched_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
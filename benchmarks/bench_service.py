@@ -0,0 +1,80 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader import Downloader
+from fake_data import CannedPrices, synthetic_closes
+from price_store import PriceStore
+from rrg_cache import RRGResultCache
+from rrg_core import compute_rrg_frame, resample_prices
+from rrg_service import RRGService, ServiceClient, load_universe, serve
+from ticker_cache import TickerCache
+from universe_cache import UniverseCache
+from universes import resolve_universe
+
+
+def fake_source(delay):
+    benchmark, sectors, _ = resolve_universe("WORLD")
+    return CannedPrices(synthetic_closes([benchmark] + sectors), delay=delay)
+
+
+def per_session(fake, sessions, timeframe):
+    # Before: every session loads and computes the universe on its own
+    def one_session(_):
+        ticker_cache = TickerCache(PriceStore(tempfile.mkdtemp(), Downloader(fake, sleep=lambda seconds: None)))
+        (data, benchmark, sectors, _, _), _ = load_universe(ticker_cache, "WORLD", None, timeframe)
+        return compute_rrg_frame(resample_prices(data, timeframe), benchmark, sectors)
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        return list(pool.map(one_session, range(sessions)))
+
+
+def through_service(fake, sessions, timeframe):
+    # After: every session asks the shared service over HTTP
+    downloader = Downloader(fake, sleep=lambda seconds: None)
+    service = RRGService(TickerCache(PriceStore(tempfile.mkdtemp(), downloader)), downloader,
+                         RRGResultCache(), UniverseCache())
+    server = serve(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = ServiceClient(f"http://127.0.0.1:{server.server_address[1]}", history=20)
+    try:
+        with ThreadPoolExecutor(max_workers=sessions) as pool:
+            results = list(pool.map(lambda _: client.rrg("WORLD", None, timeframe, price_rows=5), range(sessions)))
+        return results, service.stats()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="N sessions opening WORLD at once: per-session pipeline vs the shared service")
+    parser.add_argument("--sessions", type=int, default=30)
+    parser.add_argument("--delay", type=float, default=0.5, help="simulated download latency per call, seconds")
+    parser.add_argument("--timeframe", choices=["Weekly", "Daily"], default="Weekly")
+    args = parser.parse_args()
+
+    fake = fake_source(args.delay)
+    started = time.perf_counter()
+    per_session(fake, args.sessions, args.timeframe)
+    before_seconds, before_calls = time.perf_counter() - started, len(fake.calls)
+
+    fake = fake_source(args.delay)
+    started = time.perf_counter()
+    results, stats = through_service(fake, args.sessions, args.timeframe)
+    after_seconds, after_calls = time.perf_counter() - started, len(fake.calls)
+    assert all(result["rrg"] is not None for result in results)
+
+    print(f"{args.sessions} concurrent sessions, WORLD {args.timeframe}, {args.delay}s per download call")
+    print(f"  per session   {before_seconds:6.2f}s  {before_calls:4d} download calls")
+    print(f"  shared service {after_seconds:5.2f}s  {after_calls:4d} download calls, "
+          f"{stats['single_flight']['merged']} requests merged, universe cache {stats['universe_cache']}")
+
+
+if __name__ == "__main__":
+    main()
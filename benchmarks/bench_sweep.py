@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_data import synthetic_prices
+from rrg_core import compute_rrg_arrays, compute_rrg_sweep, sweep_grid
+
+
+def per_setting(prices, benchmark_prices, grid):
+    # One full engine run per windows setting
+    return [compute_rrg_arrays(prices, benchmark_prices, windows) for windows in grid]
+
+
+def check_equivalence(prices, benchmark_prices, grid):
+    swept = compute_rrg_sweep(prices, benchmark_prices, grid)
+    for i, expected in enumerate(per_setting(prices, benchmark_prices, grid)):
+        np.testing.assert_allclose(swept[i], expected, rtol=1e-9, equal_nan=True, err_msg=f"windows {grid[i]}")
+    print("equivalence check passed")
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RRG parameter sweep: one engine run per setting vs one shared-prefix pass")
+    parser.add_argument("--tickers", type=int, default=200)
+    parser.add_argument("--periods", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data = synthetic_prices(args.tickers, args.periods)
+    prices = data.iloc[:, 1:].to_numpy(dtype=np.float64)
+    benchmark_prices = data["BENCH"].to_numpy(dtype=np.float64)
+    check_equivalence(prices[:, :50], benchmark_prices, sweep_grid([5, 10], [26, 40], [1, 2], [4, 8]))
+
+    print(f"{args.tickers} tickers x {args.periods} bars")
+    print(" settings  per setting (s)  sweep (s)  speedup")
+    for grid in (
+        sweep_grid([10], [26], [1], [4, 6, 8]),
+        sweep_grid([5, 10, 14], [20, 26, 40], [1, 2], [4, 8]),
+        sweep_grid([5, 8, 10, 12, 14], [20, 26, 30, 40], [1, 2], [4, 6, 8]),
+    ):
+        loop = best_of(lambda: per_setting(prices, benchmark_prices, grid), args.repeat)
+        sweep = best_of(lambda: compute_rrg_sweep(prices, benchmark_prices, grid), args.repeat)
+        print(f"{len(grid):9d}  {loop:15.4f}  {sweep:9.4f}  {loop / sweep:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
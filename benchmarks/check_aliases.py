@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+from harness import report
+
+from downloader import Downloader
+from fake_data import CannedPrices, synthetic_closes
+from price_store import PriceStore
+from ticker_cache import TickerCache
+
+
+def main():
+    # 3032.HK fails its first download and retries, so ^HSTECH (priced ~1000x higher) stands in
+    closes = synthetic_closes(["^HSI", "3032.HK", "^HSTECH"])
+    closes["^HSTECH"] *= 1000
+    end = datetime.now()
+    start = end - timedelta(days=300)
+    failures = []
+
+    root = tempfile.mkdtemp()
+    clock = [end]
+    sleeps = []
+    prices = CannedPrices(closes, flaky={"3032.HK": 3})
+    store = PriceStore(root, Downloader(prices, sleep=sleeps.append), clock=lambda: clock[0])
+    proxied = store.get_closes(["^HSI", "3032.HK"], start, end)
+    print(f"first read: aliases {proxied.attrs['aliases']}, stored {sorted(os.listdir(root))}")
+    if proxied.attrs["aliases"] != {"3032.HK": "^HSTECH"}:
+        failures.append("proxied read does not report its alias")
+    if store.load("3032.HK") is not None:
+        failures.append("proxy closes were stored under the original symbol")
+
+    # Inside its retry_after, a refresh tops up the proxy without retrying the symbol
+    calls, sleeps[:] = len(prices.calls), []
+    again = store.get_closes(["^HSI", "3032.HK"], start, end)
+    retried = [tickers for tickers, _, _ in prices.calls[calls:] if "3032.HK" in tickers]
+    print(f"refresh inside retry_after: aliases {again.attrs['aliases']}, {len(retried)} fetches of 3032.HK, "
+          f"slept {sum(sleeps):.0f}s")
+    if retried or sleeps:
+        failures.append("a refresh retried the proxied symbol before its retry_after")
+    if again.attrs["aliases"] != {"3032.HK": "^HSTECH"}:
+        failures.append("a refresh inside retry_after lost the proxy")
+
+    downloader = Downloader(CannedPrices(closes, failing={"3032.HK"}), sleep=lambda seconds: None)
+    fetches = downloader(["^HSI", "3032.HK"], start, end).attrs["report"]
+    stages = [entry["stage"] for entry in fetches]
+    print(f"download report stages: {stages}")
+    if stages != ["download", "retry 1", "retry 2", "fallback ^HSTECH"]:
+        failures.append("the download report does not list the call's fetches")
+
+    clock[0] += store.retry_after
+    recovered = store.get_closes(["^HSI", "3032.HK"], start, end)
+    jump = recovered["3032.HK"].pct_change().abs().max()
+    print(f"after recovery: aliases {recovered.attrs['aliases']}, largest daily move {jump:.1%}")
+    if recovered.attrs["aliases"]:
+        failures.append("alias still reported after the real symbol downloaded")
+    if jump > 0.5:
+        failures.append("stored history mixes proxy and real closes")
+
+    clock = [end]
+    cache = TickerCache(PriceStore(tempfile.mkdtemp(),
+                                   Downloader(CannedPrices(closes, flaky={"3032.HK": 3}), sleep=lambda seconds: None),
+                                   clock=lambda: clock[0]))
+    cache.get_closes(["3032.HK"], start, end)
+    clock[0] += cache.source.retry_after
+    cache.refresh(["3032.HK"], start, end)
+    if cache.get_closes(["3032.HK"], start, end).attrs["aliases"]:
+        failures.append("ticker cache keeps the alias after a refresh with real closes")
+
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import sys
+import tempfile
+
+import numpy as np
+
+from harness import report
+
+from bench_calendar import mixed_market_closes
+from calendar_align import align_universe, parse_holiday_rules
+from downloader import Downloader
+from fake_data import CannedPrices
+from price_store import PriceStore
+from rrg_cache import RRGResultCache
+from rrg_cli import score_universe
+from rrg_core import compute_rrg_frame, latest_quadrants
+from rrg_service import RRGService
+from ticker_cache import TickerCache
+from universe_cache import UniverseCache
+from universes import PORTFOLIO_BENCHMARKS
+
+# Half Hong Kong, half US listings
+PORTFOLIO = [f"{1000 + i:04d}.HK" for i in range(30)] + [f"US{i}" for i in range(30)]
+
+
+def largest_difference(left, right):
+    return float(np.nanmax(np.abs(left.to_numpy(dtype=np.float64) - right.to_numpy(dtype=np.float64)), initial=0.0))
+
+
+def main():
+    # The same ticker against the same benchmark in two universes: as the only HK
+    # ticker 0700.HK's sessions cannot be told, so every missing day is a gap and stays
+    # empty; beside two more HK tickers the days none of them traded are holidays and filled
+    closes = mixed_market_closes("^GSPC", ["0700.HK", "AAPL", "9988.HK", "0005.HK"], 357, holiday_rate=0.04,
+                                 gap_rate=0.02)
+    failures = []
+
+    cache = RRGResultCache()
+    for sectors in (["0700.HK", "AAPL"], ["0700.HK", "9988.HK", "0005.HK"]):
+        data, freshness = align_universe(closes[["^GSPC"] + sectors], "^GSPC", sectors)
+        cached = cache.compute_frame(data, "^GSPC", sectors, "Daily")
+        difference = largest_difference(cached["0700.HK"], compute_rrg_frame(data, "^GSPC", sectors)["0700.HK"])
+        filled = int(freshness.set_index("ticker").loc["0700.HK", "filled"])
+        print(f"0700.HK beside {sectors[1]}: {filled} closes filled, cached vs computed differ by {difference:.4f} RS points")
+        if difference > 1e-3:
+            failures.append(f"cached 0700.HK beside {sectors[1]} came from the other universe's alignment")
+        if (filled > 0) != (len(sectors) > 2):
+            failures.append(f"0700.HK beside {sectors[1]}: {filled} closes filled")
+
+    # "Quadrants by Benchmark" must come from the same RS values as the chart drawn against each benchmark
+    closes = mixed_market_closes(PORTFOLIO_BENCHMARKS[0], PORTFOLIO_BENCHMARKS[1:] + PORTFOLIO, 357,
+                                 holiday_rate=0.04, gap_rate=0.02, seed=1)
+    downloader = Downloader(CannedPrices(closes), sleep=lambda seconds: None)
+    service = RRGService(TickerCache(PriceStore(tempfile.mkdtemp(), downloader)), downloader, RRGResultCache(),
+                         UniverseCache())
+    for timeframe in ("Daily", "Weekly"):
+        multi = service.benchmark_frames(PORTFOLIO, timeframe)
+        table = service.quadrants(PORTFOLIO, timeframe)
+        for benchmark in PORTFOLIO_BENCHMARKS:
+            chart = service.rrg("US Portfolio", None, timeframe, PORTFOLIO, benchmark)["rrg"]
+            frame = multi.xs(benchmark, axis=1, level=0).reindex(chart.index)
+            difference = largest_difference(frame, chart[frame.columns])
+            print(f"{timeframe} vs {benchmark}: table and chart RS values differ by {difference:.4f}")
+            if difference > 1e-3:
+                failures.append(f"{timeframe} quadrant table vs {benchmark} is not computed like the chart")
+            if not table[benchmark].equals(latest_quadrants(chart).reindex(table.index)):
+                failures.append(f"{timeframe} quadrants vs {benchmark} disagree with the chart")
+
+    # rrg_cli scores the same universe the same way whatever its chunk size
+    root = tempfile.mkdtemp()
+    store = PriceStore(root)
+    for ticker in closes.columns:
+        store.save(ticker, closes[ticker])
+    start, end = closes.index[0].to_pydatetime(), closes.index[-1].to_pydatetime()
+    whole, chunked = (score_universe(root, "ACWI", PORTFOLIO, "Daily", start, end, workers=1, chunk_size=size)
+                      for size in (250, 1))
+    difference = largest_difference(whole[["rs_ratio", "rs_momentum"]], chunked[["rs_ratio", "rs_momentum"]])
+    print(f"rrg_cli one ticker per chunk vs one chunk: RS values differ by {difference:.4f}")
+    if difference > 1e-9 or not whole["date"].equals(chunked["date"]):
+        failures.append("rrg_cli results depend on its chunk size")
+
+    # A malformed or misspelled holiday rule is rejected, not read as "drop"
+    parsed = parse_holiday_rules("CN=drop, IN ,HK=fil,jp=FFILL")
+    if parsed != {"CN": "drop", "JP": "ffill"}:
+        failures.append(f"RRG_HOLIDAY_RULES parsed as {parsed}")
+    try:
+        align_universe(closes[["ACWI", "1000.HK"]], "ACWI", ["1000.HK"], rules={"HK": "fil"})
+        failures.append("align_universe accepted the holiday rule 'fil'")
+    except ValueError as e:
+        print(f"misspelled rule: {e}")
+
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
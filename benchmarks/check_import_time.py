@@ -0,0 +1,77 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+from harness import ROOT, report
+
+APP = os.path.join(ROOT, "streamlit_RRG_Advanced.py")
+
+# Only needed once a download or GitHub fetch actually happens, or once the first
+# run builds the RRG service (unless Streamlit itself already pulls them in)
+DEFERRED = ["yfinance", "requests", "matplotlib", "bs4", "investpy", "yahoofinancials",
+            "rrg_service", "prefetch", "rrg_scanner", "price_store", "downloader", "ticker_cache",
+            "http.server", "urllib.request", "sqlite3"]
+
+
+def startup_imports(path=APP):
+    # Top-level imports of the app, i.e. what a cold script run pays before drawing anything
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules):
+    # Returns (total seconds, {top-level package: cumulative seconds}, imported module names)
+    # from -X importtime
+    code = "; ".join(f"import {module}" for module in modules)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    packages = {}
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not cumulative.isdigit():
+            continue
+        imported.add(name.strip())
+        package = name.strip().split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(cumulative) / 1e6)
+    total = sum(packages[m.split(".")[0]] for m in dict.fromkeys(m.split(".")[0] for m in modules) if m.split(".")[0] in packages)
+    return total, packages, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the app's startup import time against a budget")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("RRG_IMPORT_BUDGET", "1.2")),
+                        help="seconds (best of --repeat runs)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    modules = startup_imports()
+    runs = [measure(modules) for _ in range(args.repeat)]
+    total, packages, imported = min(runs, key=lambda run: run[0])
+    print(f"startup imports: {', '.join(modules)}")
+    for package, seconds in sorted(packages.items(), key=lambda item: -item[1])[:10]:
+        print(f"  {package:<20} {seconds * 1000:8.1f} ms")
+    print(f"total {total:.3f}s (budget {args.budget:.3f}s)")
+
+    failures = []
+    _, _, framework = measure(["streamlit"])
+    eager = [module for module in DEFERRED if module in imported and module not in framework]
+    if eager:
+        failures.append(f"imported at startup but should be deferred: {', '.join(eager)}")
+    if total > args.budget:
+        failures.append(f"startup imports took {total:.3f}s, over the {args.budget:.3f}s budget")
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import sys
+
+import numpy as np
+
+from harness import report
+
+from fake_data import synthetic_prices
+from rrg_core import compute_rrg_frame
+from rrg_incremental import IncrementalRRG, IncrementalRRGBook
+
+
+def check_slices(data, sectors, batch):
+    for sector in sectors:
+        calculator = IncrementalRRG()
+        # Feed in uneven slices to exercise state carried between calls
+        emitted = [calculator.extend(data[sector].iloc[a:b], data["BENCH"].iloc[a:b])
+                   for a, b in [(0, 7), (7, 40), (40, len(data) - 1)]]
+        live = calculator.peek(data[sector].iloc[-1], data["BENCH"].iloc[-1])
+        for frame in emitted:
+            for field in ("RS-Ratio", "RS-Momentum"):
+                np.testing.assert_allclose(frame[field].to_numpy(), batch.loc[frame.index, (sector, field)].to_numpy(),
+                                           rtol=1e-10, atol=1e-10, equal_nan=True)
+        if live is not None:
+            np.testing.assert_allclose(live, batch[sector].iloc[-1].to_numpy(), rtol=1e-10)
+
+
+def check_book(data, sectors, batch):
+    book = IncrementalRRGBook()
+    book.update(data.iloc[:-5], "BENCH", sectors, "Daily")
+    committed, live = book.update(data, "BENCH", sectors, "Daily")
+    assert len(committed) == 5, f"{len(committed)} committed bars, expected 5"
+    np.testing.assert_allclose(committed.to_numpy(), batch.loc[committed.index, committed.columns].to_numpy(),
+                               rtol=1e-10, equal_nan=True)
+    np.testing.assert_allclose(live.to_numpy(), batch.iloc[-1].to_numpy().reshape(-1, 2), rtol=1e-10, equal_nan=True)
+
+
+def check_skipped_ticker(data, sectors, batch):
+    # A ticker left out of one update() catches up on the next one
+    book = IncrementalRRGBook()
+    book.update(data.iloc[:-10], "BENCH", sectors, "Daily")
+    book.update(data.iloc[:-5], "BENCH", sectors[1:], "Daily")
+    committed, _ = book.update(data, "BENCH", sectors, "Daily")
+    skipped = committed[sectors[0]].dropna(how="all")
+    assert len(skipped) == 10, f"{len(skipped)} catch-up bars, expected 10"
+    np.testing.assert_allclose(skipped.to_numpy(), batch.loc[skipped.index, sectors[0]].to_numpy(), rtol=1e-10)
+
+
+def check_late_price(data, sectors, batch):
+    # The last closed bar arrives without a price, then is filled in by the next update
+    book = IncrementalRRGBook()
+    partial = data.iloc[:-3].copy()
+    partial.iloc[-2, partial.columns.get_loc(sectors[0])] = np.nan
+    book.update(partial, "BENCH", sectors, "Daily")
+    committed, _ = book.update(data, "BENCH", sectors, "Daily")
+    late = committed[sectors[0]].dropna(how="all")
+    assert len(late) == 4, f"{len(late)} bars from the late price on, expected 4"
+    np.testing.assert_allclose(late.to_numpy(), batch.loc[late.index, sectors[0]].to_numpy(), rtol=1e-10)
+
+
+def check_frame(data, sectors, batch):
+    # The warmer's path: a sliding lookback that grows by a few bars per warm-up (and
+    # is sometimes warmed twice on one day) must give the batch frame of each window
+    data = data.copy()
+    data.iloc[100:140:3, data.columns.get_loc(sectors[1])] = np.nan
+    book = IncrementalRRGBook()
+    previous = None
+    for start, end in [(0, 250), (2, 253), (2, 253), (5, 260), (40, 300), (41, len(data))]:
+        window = data.iloc[start:end]
+        previous = book.frame(window, "BENCH", sectors, "Daily", previous)
+        expected = compute_rrg_frame(window, "BENCH", sectors)
+        assert previous.index.equals(expected.index), f"bars {start}-{end}: index differs from the batch frame"
+        # The first bars of a later window depend on history before its start, only the rest is comparable
+        settled = expected.index[expected.index >= data.index[100]]
+        np.testing.assert_allclose(previous.loc[settled].to_numpy(), expected.loc[settled].to_numpy(),
+                                   rtol=1e-10, equal_nan=True, err_msg=f"bars {start}-{end}")
+
+
+def main():
+    data = synthetic_prices(20, 301)
+    sectors = list(data.columns[1:])
+    batch = compute_rrg_frame(data, "BENCH", sectors)
+    failures = []
+    for check in (check_slices, check_book, check_skipped_ticker, check_late_price, check_frame):
+        try:
+            check(data, sectors, batch)
+            print(f"{check.__name__}: ok")
+        except AssertionError as e:
+            failures.append(f"{check.__name__}: {str(e).strip().splitlines()[0]}")
+
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from harness import report
+
+from downloader import Downloader
+from fake_data import CannedPrices, synthetic_closes
+from price_store import PriceStore
+from ticker_cache import TickerCache
+
+
+def timed_while_busy(slow_call, call):
+    # Seconds `call` takes while `slow_call` (a download stuck in retries) is running
+    thread = threading.Thread(target=slow_call)
+    thread.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    call()
+    seconds = time.perf_counter() - started
+    thread.join()
+    return seconds
+
+
+def main():
+    end = datetime.now()
+    start = end - timedelta(days=200)
+    failures = []
+
+    # A cached request must not wait for another session's retries on a typo ticker
+    fake = CannedPrices(synthetic_closes(["A", "B", "C"]), delay=0.3)
+    cache = TickerCache(PriceStore(tempfile.mkdtemp(), Downloader(fake, backoff=1.0)))
+    cache.get_closes(["A", "B"], start, end)
+    seconds = timed_while_busy(lambda: cache.get_closes(["TYPO"], start, end),
+                               lambda: cache.get_closes(["A", "B"], start, end))
+    print(f"cached request during a retrying download: {seconds:.3f}s")
+    if seconds > 0.5:
+        failures.append("cached request waited for an unrelated download")
+
+    # Nor may a download of another symbol queue behind it in the price store
+    store = PriceStore(tempfile.mkdtemp(), Downloader(CannedPrices(synthetic_closes(["A"])), backoff=1.0))
+    seconds = timed_while_busy(lambda: store.get_closes(["TYPO"], start, end),
+                               lambda: store.get_closes(["A"], start, end))
+    print(f"store download during a retrying download: {seconds:.3f}s")
+    if seconds > 0.5:
+        failures.append("price store download queued behind an unrelated download")
+
+    # Concurrent requests for the same new symbol share one download
+    calls = len(fake.calls)
+    threads = [threading.Thread(target=cache.get_closes, args=(["C"], start, end)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"download calls for 5 concurrent requests of one symbol: {len(fake.calls) - calls}")
+    if len(fake.calls) - calls != 1:
+        failures.append("concurrent requests for one symbol were not merged")
+
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from harness import report
+
+from portfolios import BUNDLED_FILES, PortfolioLoader
+
+LIST = "AAPL\nMSFT\n0700.HK\n"
+ETAG = '"v1"'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Serves one ticker list with an ETag; while `stall` is set it answers too late for the loader.
+    # /slow.txt answers at once but sends its body a line every 0.25s, each read well inside the timeout
+    requests_seen = []
+    stall = False
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.path == "/slow.txt":
+            lines = [f"SLOW{i}\n".encode() for i in range(8)]
+            self.send_response(200)
+            self.send_header("Content-Length", str(sum(len(line) for line in lines)))
+            self.end_headers()
+            for line in lines:
+                time.sleep(0.25)
+                self.wfile.write(line)
+                self.wfile.flush()
+            return
+        if self.stall:
+            time.sleep(2.0)
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = LIST.encode()
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    # The loader hangs up on stalled lists before they are written
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    bundled_dir = tempfile.mkdtemp()
+    for portfolio_type in ("Existing", "US"):
+        with open(os.path.join(bundled_dir, BUNDLED_FILES[portfolio_type]), "w", encoding="utf-8") as f:
+            f.write("BUNDLED\n")
+    failures = []
+
+    # Unchanged list: the second load sends If-None-Match and gets a 304
+    loader = PortfolioLoader({"Existing": f"{base}/list.txt"}, timeout=0.5, bundled_dir=bundled_dir)
+    first = loader.load("Existing")
+    second = loader.load("Existing")
+    print(f"first load: {first[1]}, second load: {second[1]}, conditional header {StubHandler.requests_seen[-1][1]}")
+    if first != (["AAPL", "MSFT", "0700.HK"], "network"):
+        failures.append(f"first load returned {first}")
+    if second != (first[0], "not-modified"):
+        failures.append(f"second load returned {second}, expected a 304")
+
+    # Stalled list: the last good copy comes back after the timeout, then the network is skipped
+    StubHandler.stall = True
+    stalled, seconds = timed(lambda: loader.load("Existing"))
+    print(f"stalled list: {stalled[1]} in {seconds:.2f}s")
+    if stalled[1] != "cached" or seconds > 1.5:
+        failures.append(f"stalled list returned {stalled[1]} after {seconds:.2f}s")
+    seen = len(StubHandler.requests_seen)
+    backoff, seconds = timed(lambda: loader.load("Existing"))
+    print(f"during offline backoff: {backoff[1]} in {seconds:.3f}s")
+    if len(StubHandler.requests_seen) != seen or seconds > 0.1:
+        failures.append("load during the offline backoff went to the network")
+
+    # Stalled list with nothing cached: the bundled copy
+    fresh = PortfolioLoader({"Existing": f"{base}/list.txt"}, timeout=0.5, bundled_dir=bundled_dir)
+    bundled, seconds = timed(lambda: fresh.load("Existing"))
+    print(f"stalled list, nothing cached: {bundled[1]} in {seconds:.2f}s")
+    if bundled != (["BUNDLED"], "bundled") or seconds > 1.5:
+        failures.append(f"uncached stalled list returned {bundled} after {seconds:.2f}s")
+
+    # A list trickling in past the timeout gives up on time, without holding up the other lists
+    StubHandler.stall = False
+    loader = PortfolioLoader({"Existing": f"{base}/slow.txt", "US": f"{base}/list.txt"}, timeout=0.5,
+                             bundled_dir=bundled_dir)
+    slow = []
+    thread = threading.Thread(target=lambda: slow.append(timed(lambda: loader.load("Existing"))))
+    thread.start()
+    time.sleep(0.1)
+    other, seconds = timed(lambda: loader.load("US"))
+    thread.join()
+    print(f"other list during a slow fetch: {other[1]} in {seconds:.2f}s; "
+          f"slow list: {slow[0][0][1]} in {slow[0][1]:.2f}s")
+    if other[1] != "network" or seconds > 0.3:
+        failures.append(f"a slow fetch held up another list for {seconds:.2f}s")
+    if slow[0][0] != (["BUNDLED"], "bundled") or slow[0][1] > 0.8:
+        failures.append(f"trickling list returned {slow[0][0]} after {slow[0][1]:.2f}s")
+
+    server.shutdown()
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+from harness import report
+
+from fake_data import synthetic_prices
+from rrg_core import compute_rrg_frame, resample_prices
+from rrg_scanner import EventLog, scan_transitions
+
+
+def logged_dates(log):
+    return sorted(set(log.recent(10000)["date"]))
+
+
+def main():
+    data = resample_prices(synthetic_prices(30, 900), "Weekly")
+    sectors = list(data.columns[1:])
+    rrg_data = compute_rrg_frame(data, "BENCH", sectors)
+    dates = rrg_data.index
+    failures = []
+
+    # Midweek: the current week's bar is still forming and must not be scanned
+    log = EventLog(os.path.join(tempfile.mkdtemp(), "events.sqlite"))
+    log.scan("TEST", "BENCH", "Weekly", rrg_data.loc[:dates[-20]], sectors, as_of=dates[-20] - pd.Timedelta(days=2))
+    forming = dates[-20].strftime("%Y-%m-%d")
+    print(f"midweek scan logged {logged_dates(log)}")
+    if forming in logged_dates(log):
+        failures.append("the forming week was scanned")
+
+    # The warmer was down for ten weeks: the next scan covers every bar closed since
+    log.scan("TEST", "BENCH", "Weekly", rrg_data.loc[:dates[-10]], sectors, as_of=dates[-10] + pd.Timedelta(days=1))
+    expected = scan_transitions(rrg_data.loc[:dates[-10]], sectors, after=dates[-22])
+    expected_dates = sorted(set(expected["date"].dt.strftime("%Y-%m-%d")))
+    print(f"after the gap: {len(logged_dates(log))} dates logged, {len(expected_dates)} expected")
+    if logged_dates(log) != expected_dates:
+        failures.append(f"catch-up scan logged {logged_dates(log)}, expected {expected_dates}")
+
+    # Re-scanning the same closed bars logs nothing new
+    if log.scan("TEST", "BENCH", "Weekly", rrg_data.loc[:dates[-10]], sectors, as_of=dates[-10] + pd.Timedelta(days=1)):
+        failures.append("a repeated scan logged events again")
+
+    return report(failures)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
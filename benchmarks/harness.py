@@ -0,0 +1,15 @@
+import os
+import sys
+
+# Shared by the check and benchmark scripts: importing this module puts the repo
+# root on sys.path, so it comes before any import from the repo.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def report(failures):
+    # A check's exit code: print every failure, 1 if there were any
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
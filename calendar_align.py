@@ -0,0 +1,185 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Market of the index / special symbols; everything else goes by suffix (US when none)
+SYMBOL_MARKETS = {
+    "^HSI": "HK", "^HSTECH": "HK", "^HSNU": "HK", "^HSNF": "HK", "^HSNP": "HK", "^HSNC": "HK",
+    "^N225": "JP", "^BSESN": "IN", "^KS11": "KR", "^TWII": "TW", "TAIEX": "TW",
+    "^STOXX50E": "EU", "DX-Y.NYB": "US",
+}
+SUFFIX_MARKETS = {
+    ".HK": "HK", ".SS": "CN", ".SZ": "CN", ".T": "JP", ".KS": "KR", ".TW": "TW",
+    ".NS": "IN", ".BO": "IN", ".L": "UK", ".DE": "EU", ".PA": "EU", ".AS": "EU",
+}
+
+# What to do on a market's holidays, i.e. benchmark sessions on which no ticker of
+# that market traded: "ffill" carries the last close over (at most MAX_FILL_SESSIONS
+# in a row), "drop" leaves the day out for those tickers like the old per-pair dropna.
+# Override with RRG_HOLIDAY_RULES, e.g. "CN=drop,IN=drop".
+RULE_NAMES = ("ffill", "drop")
+
+
+def parse_holiday_rules(text):
+    # "CN=drop,IN=drop" -> {"CN": "drop", "IN": "drop"}. Items that are not
+    # MARKET=ffill / MARKET=drop are logged and ignored, so a typo in the
+    # environment neither breaks the import nor silently changes a market's rule.
+    rules = {}
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        market, separator, rule = item.partition("=")
+        market, rule = market.strip().upper(), rule.strip().lower()
+        if not separator or not market or rule not in RULE_NAMES:
+            logger.warning("Ignoring RRG_HOLIDAY_RULES item %r: expected MARKET=ffill or MARKET=drop", item.strip())
+            continue
+        rules[market] = rule
+    return rules
+
+
+HOLIDAY_RULES = {
+    "US": "ffill", "HK": "ffill", "CN": "ffill", "JP": "ffill", "KR": "ffill", "TW": "ffill",
+    "IN": "ffill", "EU": "ffill", "UK": "ffill", "FX": "ffill",
+}
+HOLIDAY_RULES.update(parse_holiday_rules(os.environ.get("RRG_HOLIDAY_RULES", "")))
+MAX_FILL_SESSIONS = 5
+# A market's sessions are only inferred from at least this many of its tickers in the
+# universe. With fewer (^N225 alone in WORLD), one feed gap would pass for a holiday
+# and be filled, so their missing closes stay NaN like the old per-pair dropna.
+MIN_MARKET_TICKERS = int(os.environ.get("RRG_MIN_MARKET_TICKERS", "3"))
+
+FRESHNESS_COLUMNS = ["ticker", "market", "last_date", "market_last_session", "sessions_behind",
+                     "filled", "gaps", "stale", "reason"]
+
+
+def market_of(ticker):
+    if ticker in SYMBOL_MARKETS:
+        return SYMBOL_MARKETS[ticker]
+    if ticker.endswith("=X"):
+        return "FX"
+    for suffix, market in SUFFIX_MARKETS.items():
+        if ticker.endswith(suffix):
+            return market
+    return "US"
+
+
+def _last_index(flags):
+    # Per column, the latest row index at or before each row where `flags` is set (-1 if none)
+    rows = np.where(flags, np.arange(len(flags))[:, None], -1)
+    return np.maximum.accumulate(rows, axis=0)
+
+
+def align_universe(data, benchmark, sectors, rules=None, max_fill=MAX_FILL_SESSIONS, as_of=None, markets=None,
+                   min_tickers=MIN_MARKET_TICKERS):
+    # One shared date index for a universe: the benchmark's sessions. A missing close
+    # is a holiday when no ticker of its market traded that day (markets with at least
+    # `min_tickers` tickers), and is filled or dropped by the market's rule; otherwise
+    # it is a gap (suspension, bad feed) and stays NaN, so the RRG engine skips that
+    # row for the ticker. Returns the aligned closes (benchmark first) and a per-ticker
+    # freshness report. `markets` overrides market_of() for individual tickers.
+    return _align(data, [benchmark], sectors, rules, max_fill, as_of, markets, min_tickers)
+
+
+def align_benchmarks(data, benchmarks, sectors, rules=None, max_fill=MAX_FILL_SESSIONS, as_of=None, markets=None,
+                     min_tickers=MIN_MARKET_TICKERS):
+    # align_universe() for several benchmarks at once, on the union of their sessions.
+    # The sectors are filled exactly as align_universe() fills them against any one of
+    # the benchmarks, and each benchmark keeps its own closes only (NaN off its
+    # sessions), so the RRG engine skips the rows align_universe() would leave out.
+    return _align(data, list(benchmarks), sectors, rules, max_fill, as_of, markets, min_tickers)
+
+
+def _align(data, benchmarks, sectors, rules, max_fill, as_of, markets, min_tickers):
+    rules = {**HOLIDAY_RULES, **(rules or {})}
+    unknown = {market: rule for market, rule in rules.items() if rule not in RULE_NAMES}
+    if unknown:
+        raise ValueError(f"Unknown holiday rule(s) {unknown}; expected one of {', '.join(RULE_NAMES)}")
+    benchmarks = list(dict.fromkeys(benchmarks))
+    tickers = benchmarks + [s for s in dict.fromkeys(sectors) if s not in benchmarks]
+    values = data[tickers].to_numpy(dtype=np.float64)
+    present = ~np.isnan(values)
+    markets = [(markets or {}).get(ticker) or market_of(ticker) for ticker in tickers]
+
+    # A market's sessions are the days any of its sectors traded. The benchmarks do not
+    # vote, so a sector is aligned the same whichever benchmark it is charted against;
+    # a benchmark's own sessions are the days it traded or its market's sectors did.
+    # Too few sectors to tell: each ticker's sessions are its own bars and nothing is
+    # a holiday, so freshness goes by its last bar and every missing close is a gap.
+    sessions = present.copy()
+    inferred = np.zeros(len(tickers), dtype=bool)
+    n_benchmarks = len(benchmarks)
+    for market in set(markets[n_benchmarks:]):
+        columns = [j for j, m in enumerate(markets) if m == market]
+        voters = [j for j in columns if j >= n_benchmarks]
+        if len(voters) < min_tickers:
+            continue
+        traded = present[:, voters].any(axis=1)[:, None]
+        sessions[:, columns] = traded | (present[:, columns] & (np.array(columns) < n_benchmarks))
+        inferred[columns] = True
+
+    fill_rule = np.array([rules.get(market, "ffill") == "ffill" for market in markets])
+    fill_rule[:n_benchmarks] = False
+    holiday = ~sessions & inferred
+    gap = ~present & ~holiday
+    last_bar = _last_index(present)
+    last_gap = _last_index(gap)
+    rows = np.arange(len(values))[:, None]
+    filled = (holiday & fill_rule & (last_bar >= 0) & (last_bar > last_gap) & (rows - last_bar <= max_fill))
+
+    aligned = values.copy()
+    fill_rows, fill_columns = np.nonzero(filled)
+    aligned[fill_rows, fill_columns] = values[last_bar[fill_rows, fill_columns], fill_columns]
+
+    keep = present[:, :n_benchmarks].any(axis=1)
+    index = data.index[keep]
+    frame = pd.DataFrame(aligned[keep], index=index, columns=tickers)
+    listed_gap = gap & (last_bar >= 0)
+    return frame, freshness_report(data.index, tickers, markets, present, sessions, filled, listed_gap, keep, as_of)
+
+
+def freshness_report(dates, tickers, markets, present, sessions, filled, gap, keep, as_of=None):
+    # Stale = the ticker's last bar is older than its market's last session in the
+    # data, or its market has had no session since the previous business day.
+    as_of = pd.Timestamp(as_of or pd.Timestamp.now()).normalize()
+    expected = as_of - pd.offsets.BDay(1)
+    columns = np.arange(len(tickers))
+    last_bar = _last_index(present)[-1] if len(dates) else np.full(len(tickers), -1)
+    last_session = _last_index(sessions)[-1] if len(dates) else np.full(len(tickers), -1)
+    sessions_seen = np.cumsum(sessions, axis=0)
+    behind = np.where(last_bar >= 0, sessions_seen[-1] - sessions_seen[np.maximum(last_bar, 0), columns], sessions_seen[-1]) \
+        if len(dates) else np.zeros(len(tickers), dtype=int)
+    last_dates = pd.Series(dates[np.maximum(last_bar, 0)] if len(dates) else pd.NaT, index=columns).where(last_bar >= 0)
+    market_last = pd.Series(dates[np.maximum(last_session, 0)] if len(dates) else pd.NaT, index=columns).where(last_session >= 0)
+
+    reasons = []
+    for market, sessions_behind, session in zip(markets, behind, market_last):
+        if sessions_behind:
+            reasons.append(f"{sessions_behind} {market} session(s) behind")
+        elif pd.isna(session) or session < expected:
+            reasons.append(f"no {market} session since {session.date() if not pd.isna(session) else 'start'}")
+        else:
+            reasons.append("")
+    return pd.DataFrame({
+        "ticker": tickers,
+        "market": markets,
+        "last_date": last_dates.dt.strftime("%Y-%m-%d").to_numpy(),
+        "market_last_session": market_last.dt.strftime("%Y-%m-%d").to_numpy(),
+        "sessions_behind": behind.astype(int),
+        "filled": filled[keep].sum(axis=0).astype(int),
+        "gaps": gap[keep].sum(axis=0).astype(int),
+        "stale": [bool(reason) for reason in reasons],
+        "reason": reasons,
+    }, columns=FRESHNESS_COLUMNS)
+
+
+def stale_message(report):
+    # One warning line for the page, or None when everything is current
+    stale = report[report["stale"]]
+    if stale.empty:
+        return None
+    details = ", ".join(f"{row.ticker} (last {row.last_date}, {row.reason})" for row in stale.itertuples(index=False))
+    return f"Stale data for {len(stale)} ticker(s): {details}"
@@ -0,0 +1,118 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from instrumentation import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Symbols Yahoo sometimes fails to serve, and what to try instead. The proxy's
+# closes are returned under the original symbol, and the returned frame's
+# attrs["aliases"] maps each proxied symbol to its proxy for that call only.
+# attrs["report"] lists every chunk, retry and fallback fetch the call made.
+FALLBACKS = {
+    "^TWII": ["TAIEX"],
+    "3032.HK": ["^HSTECH"],
+}
+
+
+def yf_download_closes(tickers, start, end):
+    import yfinance as yf
+
+    data = yf.download(tickers, start=start, end=end, progress=False)
+    if data is None or data.empty:
+        return pd.DataFrame()
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    return closes
+
+
+def _present(frame, ticker):
+    return ticker in frame.columns and not frame[ticker].dropna().empty
+
+
+class Downloader:
+    # Drop-in replacement for yf_download_closes: splits the ticker list into chunks
+    # fetched on a bounded thread pool, retries missing tickers one by one with
+    # exponential backoff and finally tries the FALLBACKS aliases. `fetch` is the
+    # network layer and can be swapped for a fake serving canned frames.
+
+    def __init__(self, fetch=yf_download_closes, chunk_size=25, max_workers=4, retries=2,
+                 backoff=1.0, fallbacks=FALLBACKS, sleep=time.sleep):
+        self.fetch = fetch
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.fallbacks = fallbacks
+        self.sleep = sleep
+
+    def _fetch_chunk(self, report, stage, tickers, start, end):
+        started = time.perf_counter()
+        try:
+            frame = self.fetch(list(tickers), start, end)
+            error = None
+        except Exception as e:
+            frame = pd.DataFrame()
+            error = str(e)
+        seconds = time.perf_counter() - started
+        missing = [t for t in tickers if not _present(frame, t)]
+        entry = {"stage": stage, "tickers": len(tickers), "seconds": round(seconds, 3), "missing": missing}
+        if error:
+            entry["error"] = error
+        logger.info("%s chunk: %d tickers in %.2fs, %d missing", stage, len(tickers), seconds, len(missing))
+        report.append(entry)
+        return frame
+
+    def _fetch_with_retries(self, report, ticker, start, end):
+        # (closes, proxy symbol or None), or None when nothing could be fetched
+        for attempt in range(self.retries):
+            self.sleep(self.backoff * 2 ** attempt)
+            frame = self._fetch_chunk(report, f"retry {attempt + 1}", [ticker], start, end)
+            if _present(frame, ticker):
+                return frame[ticker], None
+        for alias in self.fallbacks.get(ticker, []):
+            frame = self._fetch_chunk(report, f"fallback {alias}", [alias], start, end)
+            if _present(frame, alias):
+                return frame[alias], alias
+        return None
+
+    def __call__(self, tickers, start, end):
+        with METRICS.timer("download") as record:
+            result = self._download(tickers, start, end)
+            record.rows = int(result.count().sum())
+            record.bytes = int(result.memory_usage(index=True).sum())
+        return result
+
+    def _download(self, tickers, start, end):
+        tickers = list(dict.fromkeys(tickers))
+        # Appended to from the pool threads; list.append is atomic
+        report = []
+        chunks = [tickers[i:i + self.chunk_size] for i in range(0, len(tickers), self.chunk_size)]
+        columns = {}
+        aliases = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            frames = pool.map(lambda chunk: self._fetch_chunk(report, "download", chunk, start, end), chunks)
+            for chunk, frame in zip(chunks, frames):
+                for ticker in chunk:
+                    if _present(frame, ticker):
+                        columns[ticker] = frame[ticker]
+
+            missing = [t for t in tickers if t not in columns]
+            retried = pool.map(lambda t: self._fetch_with_retries(report, t, start, end), missing)
+            for ticker, fetched in zip(missing, retried):
+                if fetched is not None:
+                    columns[ticker], alias = fetched
+                    if alias:
+                        aliases[ticker] = alias
+
+        if not columns:
+            result = pd.DataFrame()
+        else:
+            result = pd.DataFrame({ticker: columns[ticker] for ticker in tickers if ticker in columns}).sort_index()
+        result.attrs["aliases"] = aliases
+        result.attrs["report"] = report
+        return result
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_closes(tickers, periods=750, end=None, seed=0, holes=0.0):
+    # Random-walk closes on business days up to `end` (today when None). `holes` is
+    # the share of bars knocked out of every column but the first, so the per-ticker
+    # alignment path is exercised.
+    end = pd.Timestamp(end or pd.Timestamp.now().normalize())
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end=end, periods=periods)
+    returns = rng.normal(0.0003, 0.015, size=(periods, len(tickers)))
+    prices = 100 * np.exp(np.cumsum(returns, axis=0))
+    if holes:
+        missing = rng.random(prices.shape) < holes
+        missing[:, 0] = False
+        prices[missing] = np.nan
+    return pd.DataFrame(prices, index=index, columns=list(tickers))
+
+
+def synthetic_prices(n_tickers, n_periods, seed=0):
+    # The benchmarks' fixed universe: "BENCH" and sectors T0000, T0001, ... with 1%
+    # missing bars, ending on a fixed date so runs are comparable
+    tickers = ["BENCH"] + [f"T{i:04d}" for i in range(n_tickers)]
+    return synthetic_closes(tickers, n_periods, end="2024-06-28", seed=seed, holes=0.01)
+
+
+class CannedPrices:
+    # Stand-in for yf_download_closes that serves slices of a fixed close frame.
+    # Tickers in `failing` raise/come back empty, `flaky` ones fail the first
+    # `flaky` attempts, and `delay` simulates network latency per call.
+
+    def __init__(self, closes, failing=(), flaky=None, delay=0.0):
+        self.closes = closes
+        self.failing = set(failing)
+        self.flaky = dict(flaky or {})
+        self.delay = delay
+        self.calls = []
+
+    def __call__(self, tickers, start, end):
+        self.calls.append((list(tickers), pd.Timestamp(start), pd.Timestamp(end)))
+        if self.delay:
+            time.sleep(self.delay)
+        served = []
+        for ticker in tickers:
+            if ticker in self.failing or ticker not in self.closes.columns:
+                continue
+            if self.flaky.get(ticker, 0) > 0:
+                self.flaky[ticker] -= 1
+                continue
+            served.append(ticker)
+        window = self.closes.loc[pd.Timestamp(start).normalize():pd.Timestamp(end), served]
+        return window.dropna(axis=1, how="all")
@@ -0,0 +1,123 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Optional exports: every timed call is appended to the JSON lines file, and the
+# Prometheus text file (for node_exporter's textfile collector) is rewritten on export.
+JSONL_PATH = os.environ.get("RRG_METRICS_JSONL")
+PROMETHEUS_PATH = os.environ.get("RRG_METRICS_PROM")
+
+
+class StageRecord:
+    # Filled in by the timed block; rows and bytes are whatever the stage processed
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+
+class Metrics:
+    # Process-wide wall time / rows / bytes per stage, plus named counters such as
+    # cache hits and misses. Thread-safe: the warmer and downloader threads record too.
+
+    def __init__(self, jsonl_path=JSONL_PATH):
+        self.jsonl_path = jsonl_path
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage):
+        record = StageRecord()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.record(stage, time.perf_counter() - started, record.rows, record.bytes)
+
+    def record(self, stage, seconds, rows=0, nbytes=0):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0, "bytes": 0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["last_seconds"] = seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["rows"] += rows
+            entry["bytes"] += nbytes
+        if self.jsonl_path:
+            line = json.dumps({"ts": time.time(), "stage": stage, "seconds": round(seconds, 6), "rows": rows, "bytes": nbytes})
+            with self._lock, open(self.jsonl_path, "a") as f:
+                f.write(line + "\n")
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def stage_rows(self):
+        with self._lock:
+            return [{"stage": stage, **entry} for stage, entry in sorted(self.stages.items())]
+
+    def reset(self):
+        with self._lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def prometheus_text(self, caches=None):
+        # Stage metrics, counters and the stats() dicts of any caches passed in
+        lines = []
+
+        def metric(name, kind, helptext, samples):
+            lines.append(f"# HELP rrg_{name} {helptext}")
+            lines.append(f"# TYPE rrg_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{value_}"' for key, value_ in labels.items())
+                lines.append(f"rrg_{name}{{{label_text}}} {value}" if label_text else f"rrg_{name} {value}")
+
+        with self._lock:
+            stages = {stage: dict(entry) for stage, entry in self.stages.items()}
+            counters = dict(self.counters)
+        for field, kind, helptext in (
+            ("calls", "counter", "Timed calls per stage"),
+            ("seconds", "counter", "Total wall time per stage in seconds"),
+            ("max_seconds", "gauge", "Slowest call per stage in seconds"),
+            ("rows", "counter", "Rows processed per stage"),
+            ("bytes", "counter", "Bytes handled per stage"),
+        ):
+            metric(f"stage_{field}", kind, helptext, [({"stage": stage}, entry[field]) for stage, entry in sorted(stages.items())])
+        for name, value in sorted(counters.items()):
+            metric(_metric_name(name), "counter", name, [({}, value)])
+        # One family per stats field, with a sample per cache
+        cache_fields = {}
+        for cache_name, stats in sorted((caches or {}).items()):
+            for field, value in stats.items():
+                cache_fields.setdefault(field, []).append(({"cache": cache_name}, value))
+        for field, samples in sorted(cache_fields.items()):
+            metric(f"cache_{_metric_name(field)}", "gauge", f"Cache {field}", samples)
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=PROMETHEUS_PATH, caches=None):
+        # Written to a temp file and renamed, so the collector never reads half a file
+        if not path:
+            return
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text(caches))
+        os.replace(tmp_path, path)
+
+    def jsonl_snapshot(self, caches=None):
+        now = time.time()
+        lines = [json.dumps({"ts": now, **row}) for row in self.stage_rows()]
+        with self._lock:
+            lines += [json.dumps({"ts": now, "counter": name, "value": value}) for name, value in sorted(self.counters.items())]
+        lines += [json.dumps({"ts": now, "cache": name, **stats}) for name, stats in sorted((caches or {}).items())]
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+METRICS = Metrics()
+
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from instrumentation import METRICS
+
+PORTFOLIO_URLS = {
+    "Existing": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/Existing%20Portfolio.txt",
+    "Monitoring": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/Monitoring%20Portfolio.txt",
+    "US": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/US%20Portfolio.txt",
+    "Screener": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/Screener%20List.txt"
+}
+
+# Copies of the same lists shipped with the app, used when GitHub is slow or unreachable
+BUNDLED_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_FILES = {
+    "Existing": "Existing Portfolio.txt",
+    "Monitoring": "Monitoring Portfolio.txt",
+    "US": "US Portfolio.txt",
+    "Screener": "Screener List.txt"
+}
+
+class GitHubFetchError(Exception):
+    pass
+
+_requests = None
+
+def _import_requests():
+    # requests is only needed for GitHub fetches; import it on first use, once
+    global _requests
+    if _requests is None:
+        try:
+            import requests
+        except ImportError:
+            raise GitHubFetchError("The 'requests' library is not installed. Please install it to fetch the portfolio from GitHub.")
+        _requests = requests
+    return _requests
+
+def parse_ticker_lines(text):
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+def fetch_portfolio_from_github(url, session=None, timeout=None, headers=None):
+    # Returns the response's tickers, or None when the server answers 304 Not Modified
+    requests = _import_requests()
+    with METRICS.timer("fetch_portfolio_from_github") as record:
+        try:
+            response = (session or requests).get(url, timeout=timeout, headers=headers)
+            record.bytes = len(response.content)
+            if response.status_code == 304:
+                return None, response
+            response.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xx
+            tickers = parse_ticker_lines(response.text)
+            if not tickers:
+                raise GitHubFetchError("No tickers found in the GitHub file.")
+            record.rows = len(tickers)
+            return tickers, response
+        except requests.RequestException as e:
+            raise GitHubFetchError(f"Failed to fetch portfolio from GitHub: {e}")
+
+def load_bundled_portfolio(portfolio_type, bundled_dir=BUNDLED_DIR):
+    path = os.path.join(bundled_dir, BUNDLED_FILES[portfolio_type])
+    try:
+        with open(path, encoding="utf-8") as f:
+            return parse_ticker_lines(f.read())
+    except OSError as e:
+        raise GitHubFetchError(f"No bundled copy of the {portfolio_type} portfolio: {e}")
+
+class PortfolioLoader:
+    # Fetches the portfolio lists over one pooled HTTP session with a strict timeout
+    # and conditional requests (ETag / Last-Modified), so unchanged lists cost a 304.
+    # On any failure it returns the last good copy or the bundled file immediately,
+    # and skips the network for `offline_backoff` seconds afterwards. `timeout` bounds
+    # the whole fetch (requests' own timeout is per connect / read, so a server that
+    # trickles the body would outlast it); the lock is never held across it.
+
+    def __init__(self, urls=PORTFOLIO_URLS, timeout=3.0, bundled_dir=BUNDLED_DIR, offline_backoff=60.0):
+        self.urls = urls
+        self.timeout = timeout
+        self.bundled_dir = bundled_dir
+        self.offline_backoff = offline_backoff
+        self._session = None
+        self._cache = {}
+        self._offline_until = 0.0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="portfolio-fetch")
+
+    def _get_session(self):
+        if self._session is None:
+            requests = _import_requests()
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            self._session.mount("https://", adapter)
+            self._session.mount("http://", adapter)
+        return self._session
+
+    def load(self, portfolio_type):
+        # Returns (tickers, source) where source is "network", "not-modified", "cached" or "bundled"
+        url = self.urls[portfolio_type]
+        with self._lock:
+            cached = self._cache.get(url)
+            online = time.monotonic() >= self._offline_until
+            session = self._get_session() if online else None
+        if online:
+            headers = {}
+            if cached and cached["etag"]:
+                headers["If-None-Match"] = cached["etag"]
+            if cached and cached["last_modified"]:
+                headers["If-Modified-Since"] = cached["last_modified"]
+            # A fetch that outlives the deadline finishes in the background and is dropped
+            future = self._pool.submit(fetch_portfolio_from_github, url, session, self.timeout, headers)
+            try:
+                tickers, response = future.result(timeout=self.timeout)
+                if tickers is None and cached:
+                    return cached["tickers"], "not-modified"
+                if tickers is not None:
+                    with self._lock:
+                        self._cache[url] = {
+                            "tickers": tickers,
+                            "etag": response.headers.get("ETag"),
+                            "last_modified": response.headers.get("Last-Modified"),
+                        }
+                    return tickers, "network"
+            except (GitHubFetchError, TimeoutError):
+                with self._lock:
+                    self._offline_until = time.monotonic() + self.offline_backoff
+        if cached:
+            return cached["tickers"], "cached"
+        return load_bundled_portfolio(portfolio_type, self.bundled_dir), "bundled"
+
+def normalize_ticker(ticker):
+    if ticker.isalpha():
+        return ticker.upper()
+    numeric_part = ''.join(filter(str.isdigit, ticker))
+    if numeric_part:
+        return f"{int(numeric_part):04d}.HK"
+    return ticker
@@ -0,0 +1,172 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from calendar_align import align_universe
+from portfolios import normalize_ticker
+from rrg_core import lookback_start, resample_prices
+from rrg_incremental import IncrementalRRGBook
+from universe_cache import compact_frame
+from universes import PORTFOLIO_BENCHMARKS, PORTFOLIO_UNIVERSES, REGISTRY, resolve_universe
+
+logger = logging.getLogger(__name__)
+
+# Warm-up times as HH:MM@timezone, shortly after each market's close.
+DEFAULT_SCHEDULE = os.environ.get("RRG_WARM_SCHEDULE", "16:15@Asia/Hong_Kong,16:30@America/New_York")
+TIMEFRAMES = ["Weekly", "Daily"]
+
+
+def parse_schedule(spec):
+    schedule = []
+    for item in spec.split(","):
+        clock, tz = item.strip().split("@")
+        hour, minute = clock.split(":")
+        schedule.append((int(hour), int(minute), ZoneInfo(tz)))
+    return schedule
+
+
+def next_run(schedule, now=None):
+    # Earliest scheduled weekday close after `now` across all markets.
+    now = now or datetime.now(timezone.utc)
+    candidates = []
+    for hour, minute, tz in schedule:
+        local = now.astimezone(tz)
+        run = local.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        while run <= local or run.weekday() >= 5:
+            run = (run + timedelta(days=1)).replace(hour=hour, minute=minute)
+        candidates.append(run.astimezone(timezone.utc))
+    return min(candidates)
+
+
+def preset_universes(load_portfolio):
+    # (universe, sector, custom_tickers, custom_benchmark) for every preset the
+    # sidebar can show before the user edits anything.
+    presets = [(universe, sector, None, None) for universe, sector in REGISTRY.presets()]
+    for universe in PORTFOLIO_UNIVERSES:
+        try:
+            tickers = load_portfolio(universe.split()[0])
+        except Exception as e:
+            logger.warning("Could not load %s for warm-up: %s", universe, e)
+            continue
+        if tickers:
+            tickers = [normalize_ticker(ticker) for ticker in tickers]
+            presets += [(universe, None, tickers, benchmark) for benchmark in PORTFOLIO_BENCHMARKS]
+    return presets
+
+
+def universe_label(universe, sector, custom_benchmark):
+    if sector:
+        return f"{universe} / {sector}"
+    if custom_benchmark:
+        return f"{universe} vs {custom_benchmark}"
+    return universe
+
+
+class UniverseWarmer:
+    # Background thread that keeps every preset universe's prices and RRG frames
+    # computed. It warms once on start, then again at each scheduled close, so
+    # page loads can pick up finished results instead of computing them. After the
+    # first pass, each universe's IncrementalRRGBook only computes the bars closed
+    # since its last warm-up. With an event_log, each warmed frame is also scanned
+    # for quadrant transitions.
+
+    def __init__(self, ticker_cache, load_portfolio, schedule=DEFAULT_SCHEDULE, timeframes=TIMEFRAMES, on_warm=None,
+                 event_log=None):
+        self.ticker_cache = ticker_cache
+        self.load_portfolio = load_portfolio
+        self.schedule = parse_schedule(schedule)
+        self.timeframes = timeframes
+        self.on_warm = on_warm
+        self.event_log = event_log
+        self.results = {}
+        self._books = {}
+        self.status = {}
+        self.next_run = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _warm_one(self, label, universe, sector, custom_tickers, custom_benchmark, timeframe, end_date):
+        benchmark, sectors, _ = resolve_universe(universe, sector, custom_tickers, custom_benchmark)
+        data = self.ticker_cache.get_closes([benchmark] + sectors, lookback_start(timeframe, end_date), end_date)
+        data = data.dropna(axis=1, how="all")
+        if benchmark not in data.columns:
+            raise ValueError(f"No data for benchmark {benchmark}")
+        valid_sectors = [s for s in sectors if s in data.columns]
+        data, _ = align_universe(data, benchmark, valid_sectors, as_of=end_date)
+        # Same float32 closes as the service's load_universe, so warmed and live results agree
+        data = compact_frame(data)
+        key = (universe, sector, timeframe, benchmark, tuple(valid_sectors))
+        with self._lock:
+            previous = self.results.get(key)
+        book = self._books.setdefault(key, IncrementalRRGBook())
+        try:
+            rrg_data = book.frame(resample_prices(data, timeframe), benchmark, valid_sectors, timeframe,
+                                  previous[1] if previous else None)
+        except Exception:
+            # A book that stopped halfway no longer matches the stored frame
+            self._books.pop(key, None)
+            raise
+        rrg_data = compact_frame(rrg_data)
+        with self._lock:
+            self.results[key] = (data.index.max(), rrg_data)
+        if self.event_log is not None:
+            return self.event_log.scan(label, benchmark, timeframe, rrg_data, valid_sectors, as_of=end_date)
+        return 0
+
+    def warm_all(self):
+        presets = preset_universes(self.load_portfolio)
+        end_date = datetime.now()
+        # One top-up for the distinct symbols of all universes, then every universe is served from memory
+        self.ticker_cache.refresh(REGISTRY.fetch_plan(presets), lookback_start("Weekly", end_date), end_date)
+
+        for universe, sector, custom_tickers, custom_benchmark in presets:
+            label = universe_label(universe, sector, custom_benchmark)
+            for timeframe in self.timeframes:
+                started = time.perf_counter()
+                entry = dict(self.status.get((label, timeframe), {}))
+                try:
+                    entry["events"] = self._warm_one(label, universe, sector, custom_tickers, custom_benchmark,
+                                                     timeframe, end_date)
+                    entry["last_success"] = datetime.now().isoformat(timespec="seconds")
+                    entry["duration"] = round(time.perf_counter() - started, 3)
+                    entry.pop("error", None)
+                except Exception as e:
+                    logger.warning("Warm-up failed for %s (%s): %s", label, timeframe, e)
+                    entry["error"] = str(e)
+                with self._lock:
+                    self.status[(label, timeframe)] = entry
+
+        if self.on_warm:
+            self.on_warm()
+
+    def get_result(self, universe, sector, timeframe, benchmark, sectors, last_date):
+        with self._lock:
+            result = self.results.get((universe, sector, timeframe, benchmark, tuple(sectors)))
+        if result is None or result[0] != last_date:
+            return None
+        return result[1]
+
+    def status_rows(self):
+        with self._lock:
+            return [
+                {"universe": label, "timeframe": timeframe, **entry}
+                for (label, timeframe), entry in sorted(self.status.items())
+            ]
+
+    def _run(self):
+        while True:
+            try:
+                self.warm_all()
+            except Exception:
+                logger.exception("Universe warm-up failed")
+            self.next_run = next_run(self.schedule)
+            time.sleep(max(0.0, (self.next_run - datetime.now(timezone.utc)).total_seconds()))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rrg-warmer", daemon=True)
+            self._thread.start()
+        return self
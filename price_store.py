@@ -0,0 +1,223 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from downloader import Downloader
+
+DEFAULT_STORE_DIR = os.environ.get(
+    "RRG_PRICE_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".price_store")
+)
+# How long a symbol that had to be proxied, or could not be downloaded at all, is
+# left alone before the next update tries it (and its retry backoff) again
+RETRY_AFTER = timedelta(minutes=float(os.environ.get("RRG_RETRY_AFTER_MINUTES", "30")))
+
+
+class InFlight:
+    # Per-symbol futures for fetches that are running right now. claim() hands each
+    # symbol to exactly one caller; everyone else waits on that caller's future
+    # instead of fetching the symbol again or holding a lock across the network.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures = {}
+        self.merged = 0
+
+    def claim(self, keys):
+        # Returns (keys this caller must fetch, {key: future} to wait on)
+        owned, waiting = [], {}
+        with self._lock:
+            for key in keys:
+                future = self._futures.get(key)
+                if future is None:
+                    self._futures[key] = Future()
+                    owned.append(key)
+                else:
+                    waiting[key] = future
+            self.merged += len(waiting)
+        return owned, waiting
+
+    def resolve(self, keys, results=None, error=None):
+        with self._lock:
+            futures = [self._futures.pop(key) for key in keys]
+        for key, future in zip(keys, futures):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((results or {}).get(key))
+
+
+class PriceStore:
+    # Daily closes kept on disk as one Parquet file per ticker. Reads serve the
+    # stored history and only the bars after each ticker's last stored date are
+    # downloaded again; the last stored bar is re-fetched since it may have been
+    # a partial session. Closes a Downloader fallback served for a symbol are kept
+    # under the proxy's own symbol and only stand in for the original at read time.
+    # A symbol that failed is noted in the manifest ("retry_after", plus its "alias")
+    # and until then only its proxy is topped up.
+
+    def __init__(self, root=DEFAULT_STORE_DIR, download=None, retry_after=RETRY_AFTER, clock=datetime.now):
+        self.root = root
+        self.download = download or Downloader()
+        self.retry_after = retry_after
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._flights = InFlight()
+        os.makedirs(self.root, exist_ok=True)
+        self._manifest_path = os.path.join(self.root, "manifest.json")
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        try:
+            with open(self._manifest_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    def _path(self, ticker):
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9._-]", "_", ticker) + ".parquet")
+
+    def load(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return None
+        series = pd.read_parquet(path)["Close"]
+        series.name = ticker
+        return series
+
+    def save(self, ticker, series):
+        series = series.dropna().sort_index()
+        series = series[~series.index.duplicated(keep="last")]
+        tmp_path = self._path(ticker) + ".tmp"
+        series.rename("Close").to_frame().to_parquet(tmp_path)
+        os.replace(tmp_path, self._path(ticker))
+        return series
+
+    def append(self, ticker, new_bars):
+        stored = self.load(ticker)
+        if stored is not None:
+            new_bars = pd.concat([stored, new_bars])
+        return self.save(ticker, new_bars)
+
+    def _fetch_plan(self, tickers, start):
+        # Group tickers by the date their download has to start from, so each
+        # group is one download call.
+        plan = {}
+        for ticker in tickers:
+            if not self._covers(ticker, start):
+                fetch_from = start
+            else:
+                fetch_from = pd.Timestamp(self._manifest[ticker]["last_date"]).to_pydatetime()
+            plan.setdefault(fetch_from, []).append(ticker)
+        return plan
+
+    def _covers(self, ticker, start):
+        entry = self._manifest.get(ticker, {})
+        return "covered_from" in entry and pd.Timestamp(entry["covered_from"]) <= pd.Timestamp(start.date())
+
+    def _backed_off(self, tickers):
+        # {ticker: proxy symbol or None} for the tickers still inside their retry_after
+        now = self.clock().isoformat(timespec="seconds")
+        entries = {ticker: self._manifest.get(ticker, {}) for ticker in tickers}
+        return {ticker: entry.get("alias") for ticker, entry in entries.items() if entry.get("retry_after", "") > now}
+
+    def update(self, tickers, start, end=None):
+        # Download whatever each ticker is missing for [start, end] into the store.
+        # The lock only guards the files and the manifest; downloads run outside it,
+        # and a symbol another caller is already downloading is waited for, not repeated.
+        # Returns {symbol: proxy symbol} for the symbols this download had to proxy.
+        end = end or datetime.now()
+        tickers = list(dict.fromkeys(tickers))
+        owned, waiting = self._flights.claim(tickers)
+        aliases = {}
+        try:
+            with self._lock:
+                backed_off = self._backed_off(owned)
+                plan = self._fetch_plan([t for t in owned if t not in backed_off], start)
+            aliases.update({ticker: alias for ticker, alias in backed_off.items() if alias})
+            proxies = [alias for alias in aliases.values() if alias not in owned]
+            if proxies:
+                self.update(proxies, start, end)
+            for fetch_from, group in plan.items():
+                downloaded = self.download(group, fetch_from, end + timedelta(days=1))
+                aliases.update(self._store(group, downloaded, start))
+        except BaseException as e:
+            self._flights.resolve(owned, error=e)
+            raise
+        self._flights.resolve(owned, aliases)
+
+        for ticker, future in waiting.items():
+            alias = future.result()
+            if alias:
+                aliases[ticker] = alias
+        # The other caller may have asked for a shorter history than this one
+        with self._lock:
+            short = [t for t in waiting if t in self._manifest and not self._covers(t, start)]
+        if short:
+            aliases.update(self.update(short, start, end))
+        return aliases
+
+    def _store(self, group, downloaded, start):
+        proxied = downloaded.attrs.get("aliases", {})
+        aliases = {}
+        retry_after = (self.clock() + self.retry_after).isoformat(timespec="seconds")
+        with self._lock:
+            for ticker in group:
+                if ticker not in downloaded.columns or downloaded[ticker].dropna().empty:
+                    self._manifest[ticker] = {**self._manifest.get(ticker, {}), "retry_after": retry_after}
+                    continue
+                # Never mix a proxy's closes into the symbol's own history
+                symbol = proxied.get(ticker, ticker)
+                if symbol != ticker:
+                    aliases[ticker] = symbol
+                    self._manifest[ticker] = {**self._manifest.get(ticker, {}), "retry_after": retry_after,
+                                              "alias": symbol}
+                series = self.append(symbol, downloaded[ticker])
+                entry = self._manifest.get(symbol, {})
+                covered_from = min(pd.Timestamp(entry.get("covered_from", start.date())), pd.Timestamp(start.date()))
+                self._manifest[symbol] = {
+                    "covered_from": covered_from.strftime("%Y-%m-%d"),
+                    "last_date": series.index.max().strftime("%Y-%m-%d"),
+                    "updated": datetime.now().isoformat(timespec="seconds"),
+                }
+            self._write_manifest()
+        return aliases
+
+    def read(self, tickers, start, end=None):
+        # Stored closes only, no network.
+        end = end or datetime.now()
+        columns = {}
+        for ticker in tickers:
+            series = self.load(ticker)
+            if series is not None:
+                columns[ticker] = series.loc[pd.Timestamp(start.date()):pd.Timestamp(end.date())]
+        if not columns:
+            return pd.DataFrame()
+        return pd.DataFrame(columns).sort_index()
+
+    def get_closes(self, tickers, start, end=None):
+        # Stored closes after a top-up. A symbol that had to be proxied and has no
+        # closes of its own in the window gets the proxy's, listed in attrs["aliases"].
+        end = end or datetime.now()
+        tickers = list(dict.fromkeys(tickers))
+        aliases = self.update(tickers, start, end)
+        data = self.read(tickers + [alias for alias in aliases.values() if alias not in tickers], start, end)
+        used = {}
+        for ticker, alias in aliases.items():
+            if alias in data.columns and (ticker not in data.columns or data[ticker].dropna().empty):
+                data[ticker] = data[alias]
+                used[ticker] = alias
+        if not data.empty:
+            data = data[[ticker for ticker in tickers if ticker in data.columns]]
+        data.attrs["aliases"] = used
+        return data
@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import METRICS
+from rrg_core import DEFAULT_WINDOWS, RRG_FIELDS, compute_rrg_arrays, validate_windows
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RRG_RESULT_CACHE_MB", "64")) * 1024 * 1024)
+
+
+def _price_key(value):
+    # NaN never compares equal, so it would never hit
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def alignment_signatures(values):
+    # Per column of a (dates, tickers) array: a hash of its NaN layout and the sum of
+    # its closes. calendar_align fills or leaves a holiday depending on the other
+    # tickers in the universe, so the same ticker and window can hold different series.
+    missing = np.packbits(np.isnan(values), axis=0)
+    sums = np.nansum(values, axis=0)
+    return [(hash(missing[:, j].tobytes()), float(sums[j])) for j in range(values.shape[1])]
+
+
+def fingerprint(ticker, benchmark, timeframe, index, last_price, last_benchmark_price, windows=DEFAULT_WINDOWS,
+                alignment=None):
+    # Cheap stand-in for hashing the whole series: the window (last bar, bar count),
+    # the latest closes, so a revised intraday bar still misses, and the ticker's and
+    # benchmark's alignment_signatures().
+    last_bar = index[-1] if len(index) else None
+    return (ticker, benchmark, timeframe, last_bar, len(index), _price_key(last_price), _price_key(last_benchmark_price),
+            tuple(windows), alignment)
+
+
+class RRGResultCache:
+    # Per-ticker RS-Ratio / RS-Momentum arrays keyed on fingerprint(), LRU-evicted
+    # once over `max_bytes`. compute_frame() serves hits from memory and runs the
+    # batched engine once for all misses. Results are kept and returned as float32.
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _put(self, key, values):
+        if key in self._entries:
+            self._nbytes -= self._entries.pop(key).nbytes
+        self._entries[key] = values
+        self._nbytes += values.nbytes
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def compute_frame(self, data, benchmark, sectors, timeframe, windows=DEFAULT_WINDOWS):
+        # Same result as compute_rrg_frame(data, benchmark, sectors, windows)
+        windows = validate_windows(windows)
+        prices = data[sectors].to_numpy(dtype=np.float64)
+        benchmark_prices = data[benchmark].to_numpy(dtype=np.float64)
+        last_benchmark_price = benchmark_prices[-1] if len(benchmark_prices) else None
+        signatures = alignment_signatures(prices)
+        benchmark_signature = alignment_signatures(benchmark_prices[:, None])[0]
+        keys = [
+            fingerprint(sector, benchmark, timeframe, data.index, prices[-1, j] if len(prices) else None, last_benchmark_price,
+                        windows, (signatures[j], benchmark_signature))
+            for j, sector in enumerate(sectors)
+        ]
+        values = np.empty((len(sectors), len(data.index), 2), dtype=np.float32)
+        missing = []
+        with self._lock:
+            for j, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is None:
+                    missing.append(j)
+                else:
+                    self._entries.move_to_end(key)
+                    values[j] = cached
+            self.hits += len(sectors) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            with METRICS.timer("calculate_rrg_values") as record:
+                computed = compute_rrg_arrays(prices[:, missing], benchmark_prices, windows)
+                record.rows = len(missing)
+            values[missing] = computed
+            with self._lock:
+                for j in missing:
+                    self._put(keys[j], values[j].copy())
+
+        columns = pd.MultiIndex.from_product([sectors, RRG_FIELDS])
+        return pd.DataFrame(values.transpose(1, 0, 2).reshape(len(data.index), -1), index=data.index, columns=columns)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from calendar_align import align_universe
+from portfolios import normalize_ticker
+from price_store import DEFAULT_STORE_DIR, PriceStore
+from rrg_core import QUADRANTS, compute_rrg_arrays, lookback_start, quadrant_codes, resample_prices
+
+
+def _no_download(tickers, start, end):
+    return pd.DataFrame()
+
+
+def read_ticker_file(path):
+    # Same format as "Screener List.txt": one ticker per line, HK codes may be bare numbers
+    with open(path) as f:
+        tickers = [normalize_ticker(line.strip()) for line in f if line.strip()]
+    return list(dict.fromkeys(tickers))
+
+
+def latest_points(tickers, dates, rrg):
+    # Last bar where each ticker has both RS-Ratio and RS-Momentum.
+    valid = np.isfinite(rrg[:, :, 0]) & np.isfinite(rrg[:, :, 1])
+    has_point = valid.any(axis=1)
+    last = rrg.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    rows = np.arange(len(tickers))
+    ratio = np.where(has_point, rrg[rows, last, 0], np.nan)
+    momentum = np.where(has_point, rrg[rows, last, 1], np.nan)
+    codes = quadrant_codes(ratio, momentum)
+    last_dates = pd.Series(dates[last] if len(dates) else np.empty(len(tickers), dtype="datetime64[ns]"))
+    return pd.DataFrame({
+        "ticker": tickers,
+        "date": last_dates.where(has_point),
+        "rs_ratio": ratio,
+        "rs_momentum": momentum,
+        "quadrant": [QUADRANTS[code] if code >= 0 else "" for code in codes],
+    })
+
+
+def score_chunk(job):
+    # Runs in a worker process: RRG points of one chunk of the aligned universe.
+    tickers, dates, prices, benchmark_prices = job
+    return latest_points(tickers, dates, compute_rrg_arrays(prices, benchmark_prices))
+
+
+def score_universe(store_dir, benchmark, tickers, timeframe, start, end, workers=None, chunk_size=250):
+    # The whole universe is aligned once, so every chunk is scored on the same
+    # sessions whatever the chunk size; only the aligned arrays go to the workers.
+    store = PriceStore(store_dir, download=_no_download)
+    data = store.read([benchmark] + tickers, start, end)
+    data = data.dropna(axis=1, how="all")
+    tickers = [t for t in tickers if t in data.columns and t != benchmark]
+    data, _ = align_universe(data, benchmark, tickers, as_of=end)
+    data = resample_prices(data, timeframe)
+    dates = data.index.to_numpy()
+    benchmark_prices = data[benchmark].to_numpy(dtype=np.float64)
+    jobs = []
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+        jobs.append((chunk, dates, data[chunk].to_numpy(dtype=np.float64), benchmark_prices))
+    if workers == 1 or len(jobs) <= 1:
+        results = [score_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(score_chunk, jobs))
+    if not results:
+        return latest_points([], np.array([], dtype="datetime64[ns]"), np.empty((0, 0, 2)))
+    return pd.concat(results, ignore_index=True)
+
+
+def write_results(results, path):
+    if path.endswith(".parquet"):
+        results.to_parquet(path, index=False)
+    else:
+        results.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute RRG quadrants for a ticker file without the Streamlit app")
+    parser.add_argument("ticker_file", help="one ticker per line, as in 'Screener List.txt'")
+    parser.add_argument("--benchmark", default="^HSI")
+    parser.add_argument("--timeframe", choices=["Weekly", "Daily"], default="Weekly")
+    parser.add_argument("--output", default="rrg_results.csv", help=".csv or .parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="price store directory")
+    parser.add_argument("--no-download", action="store_true", help="only use prices already in the store")
+    args = parser.parse_args(argv)
+
+    tickers = read_ticker_file(args.ticker_file)
+    end_date = datetime.now()
+    start_date = lookback_start(args.timeframe, end_date)
+    store = PriceStore(args.store, download=_no_download if args.no_download else None)
+
+    started = time.perf_counter()
+    if not args.no_download:
+        store.update([args.benchmark] + tickers, start_date, end_date)
+    if store.load(args.benchmark) is None:
+        print(f"No data available for the benchmark {args.benchmark}", file=sys.stderr)
+        return 1
+    loaded = time.perf_counter()
+
+    results = score_universe(args.store, args.benchmark, tickers, args.timeframe, start_date, end_date,
+                             args.workers, args.chunk_size)
+    computed = time.perf_counter()
+    write_results(results, args.output)
+
+    missing = len(tickers) - len(results)
+    print(f"{len(results)} tickers scored ({missing} without data) -> {args.output}")
+    print(f"download {loaded - started:.2f}s, read + rrg {computed - loaded:.2f}s with {args.workers} workers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
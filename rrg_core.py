@@ -0,0 +1,271 @@
+from datetime import timedelta
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+RRG_FIELDS = ["RS-Ratio", "RS-Momentum"]
+QUADRANTS = ["Lagging", "Weakening", "Improving", "Leading"]
+# (RS-Ratio short, RS-Ratio long, RS-Momentum short, RS-Momentum long) moving-average windows
+DEFAULT_WINDOWS = (10, 26, 1, 4)
+# Chart axis limits around 100 for both RS-Ratio and RS-Momentum
+DEFAULT_CLAMP = (80, 120)
+
+
+def get_quadrant(x, y):
+    if x < 100 and y < 100: return "Lagging"
+    elif x >= 100 and y < 100: return "Weakening"
+    elif x < 100 and y >= 100: return "Improving"
+    else: return "Leading"
+
+
+def quadrant_codes(x, y):
+    # Vectorized get_quadrant: index into QUADRANTS, -1 where either value is NaN.
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    codes = (x >= 100).astype(np.int8) + 2 * (y >= 100).astype(np.int8)
+    return np.where(np.isnan(x) | np.isnan(y), -1, codes)
+
+
+def rolling_mean(values, window):
+    # Column-wise trailing mean over axis 0, NaN whenever the window holds a NaN
+    # (same semantics as pandas .rolling(window).mean()).
+    values = np.asarray(values, dtype=np.float64)
+    if window == 1:
+        return values.copy()
+    return _prefix_mean(_prefix_sums(values), window)
+
+
+def _prefix_sums(values):
+    # Running sums and NaN counts behind a leading zero row: the trailing mean over
+    # any window is then two lookups, so one prefix serves every window length.
+    isnan = np.isnan(values)
+    zeros = np.zeros((1,) + values.shape[1:])
+    csum = np.concatenate([zeros, np.cumsum(np.where(isnan, 0.0, values), axis=0)])
+    cnan = np.concatenate([zeros, np.cumsum(isnan, axis=0)])
+    return csum, cnan
+
+
+def _prefix_mean(prefix, window):
+    csum, cnan = prefix
+    out = np.full((csum.shape[0] - 1,) + csum.shape[1:], np.nan)
+    if window > out.shape[0]:
+        return out
+    total = csum[window:] - csum[:-window]
+    nans = cnan[window:] - cnan[:-window]
+    out[window - 1:] = np.where(nans == 0, total / window, np.nan)
+    return out
+
+
+def validate_windows(windows):
+    windows = tuple(int(w) for w in windows)
+    if len(windows) != 4 or min(windows) < 1:
+        raise ValueError(f"RRG windows must be four positive integers "
+                         f"(ratio short, ratio long, momentum short, momentum long), got {windows}")
+    return windows
+
+
+def compute_rrg_arrays(prices, benchmark_prices, windows=DEFAULT_WINDOWS):
+    # prices: (n_periods, n_tickers), benchmark_prices: (n_periods,)
+    # Returns a (n_tickers, n_periods, 2) array of RS-Ratio / RS-Momentum.
+    prices = np.asarray(prices, dtype=np.float64)
+    benchmark_prices = np.asarray(benchmark_prices, dtype=np.float64)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    return rrg_from_ratios(prices / benchmark_prices[:, None], windows)
+
+
+def _rrg_lines(sbr, windows=DEFAULT_WINDOWS):
+    rs_short, rs_long, rm_short, rm_long = windows
+    rs1 = rolling_mean(sbr, rs_short)
+    rs2 = rolling_mean(sbr, rs_long)
+    rs = 100 * ((rs1 - rs2) / rs2 + 1)
+    rm1 = rolling_mean(rs, rm_short)
+    rm2 = rolling_mean(rs, rm_long)
+    rm = 100 * ((rm1 - rm2) / rm2 + 1)
+    return rs, rm
+
+
+def rrg_from_ratios(sbr, windows=DEFAULT_WINDOWS):
+    # sbr: (n_periods, n_series) price / benchmark ratios, NaN where not aligned.
+    windows = validate_windows(windows)
+    n_periods, n_tickers = sbr.shape
+    result = np.full((n_tickers, n_periods, 2), np.nan)
+    if n_periods == 0 or n_tickers == 0:
+        return result
+
+    valid = np.isfinite(sbr)
+    sbr = np.where(valid, sbr, np.nan)
+    ratio = np.full((n_periods, n_tickers), np.nan)
+    momentum = np.full((n_periods, n_tickers), np.nan)
+
+    # Columns whose valid rows are one contiguous run (only leading / trailing NaN,
+    # e.g. everything calendar_align has aligned) roll in place: NaN already keeps
+    # the windows out of the empty rows. Only columns with holes need compacting.
+    counts = valid.sum(axis=0)
+    first = valid.argmax(axis=0)
+    last = n_periods - 1 - valid[::-1].argmax(axis=0)
+    contiguous = (counts == 0) | (last - first + 1 == counts)
+    if contiguous.any():
+        ratio[:, contiguous], momentum[:, contiguous] = _rrg_lines(sbr[:, contiguous], windows)
+
+    holes = ~contiguous
+    if holes.any():
+        # Each ticker is aligned with the benchmark on its own (the old concat + dropna),
+        # so the rolling windows skip missing rows. Compact the valid rows of every column
+        # to the top, roll once over the whole matrix, then scatter back to the dates.
+        order = np.argsort(~valid[:, holes], axis=0, kind="stable")
+        rs, rm = _rrg_lines(np.take_along_axis(sbr[:, holes], order, axis=0), windows)
+        scattered_rs = np.full(rs.shape, np.nan)
+        scattered_rm = np.full(rm.shape, np.nan)
+        np.put_along_axis(scattered_rs, order, rs, axis=0)
+        np.put_along_axis(scattered_rm, order, rm, axis=0)
+        ratio[:, holes] = scattered_rs
+        momentum[:, holes] = scattered_rm
+    ratio[~valid] = np.nan
+    momentum[~valid] = np.nan
+
+    result[:, :, 0] = ratio.T
+    result[:, :, 1] = momentum.T
+    return result
+
+
+def compute_rrg_frame(data, benchmark, sectors, windows=DEFAULT_WINDOWS):
+    # Batched equivalent of calling calculate_rrg_values for every sector.
+    # Columns are a (ticker, field) MultiIndex over the full date index.
+    values = compute_rrg_arrays(data[sectors].to_numpy(dtype=np.float64), data[benchmark].to_numpy(dtype=np.float64),
+                                windows)
+    columns = pd.MultiIndex.from_product([sectors, RRG_FIELDS])
+    return pd.DataFrame(values.transpose(1, 0, 2).reshape(len(data.index), -1), index=data.index, columns=columns)
+
+
+def compute_rrg_multi(prices, benchmark_prices, windows=DEFAULT_WINDOWS):
+    # prices: (n_periods, n_tickers), or (n_periods, n_benchmarks, n_tickers) when each
+    # benchmark sees its own copy; benchmark_prices: (n_periods, n_benchmarks).
+    # Broadcasts every ticker against every benchmark and runs the engine once.
+    # Returns a (n_benchmarks, n_tickers, n_periods, 2) array.
+    prices = np.asarray(prices, dtype=np.float64)
+    benchmark_prices = np.asarray(benchmark_prices, dtype=np.float64)
+    if prices.ndim == 2:
+        prices = prices[:, None, :]
+    n_periods, n_tickers = prices.shape[0], prices.shape[2]
+    n_benchmarks = benchmark_prices.shape[1]
+    sbr = prices / benchmark_prices[:, :, None]
+    result = rrg_from_ratios(sbr.reshape(n_periods, n_benchmarks * n_tickers), windows)
+    return result.reshape(n_benchmarks, n_tickers, n_periods, 2)
+
+
+def compute_rrg_multi_frame(data, benchmarks, sectors, windows=DEFAULT_WINDOWS, timeframe="Daily"):
+    # Daily closes on the union of the benchmarks' sessions (calendar_align.align_benchmarks)
+    # in, (benchmark, ticker, field) columns out. Each benchmark reads the sectors on its
+    # own sessions only, before resampling, so .xs(benchmark, axis=1) matches
+    # compute_rrg_frame over resample_prices() of that benchmark's own calendar.
+    benchmark_data = data[benchmarks]
+    traded = benchmark_data.notna().to_numpy()
+    prices = data[sectors].to_numpy(dtype=np.float64)
+    masked = np.where(traded[:, :, None], prices[:, None, :], np.nan)
+    masked = pd.DataFrame(masked.reshape(len(data.index), -1), index=data.index,
+                          columns=pd.MultiIndex.from_product([benchmarks, sectors]))
+    benchmark_data = resample_prices(benchmark_data, timeframe)
+    masked = resample_prices(masked, timeframe)
+    index = benchmark_data.index
+    values = compute_rrg_multi(masked.to_numpy(dtype=np.float64).reshape(len(index), len(benchmarks), len(sectors)),
+                               benchmark_data.to_numpy(dtype=np.float64), windows)
+    columns = pd.MultiIndex.from_product([benchmarks, sectors, RRG_FIELDS])
+    return pd.DataFrame(values.transpose(2, 0, 1, 3).reshape(len(index), -1), index=index, columns=columns)
+
+
+def sweep_grid(ratio_short, ratio_long, momentum_short, momentum_long):
+    # Every combination of the given windows, in DEFAULT_WINDOWS order
+    return [validate_windows(windows) for windows in product(ratio_short, ratio_long, momentum_short, momentum_long)]
+
+
+def rrg_sweep_from_ratios(sbr, grid):
+    # rrg_from_ratios for every windows tuple in `grid` in one pass. The ratios are
+    # compacted and prefix-summed once, so each distinct ratio window costs two
+    # lookups; each distinct RS-Ratio line is prefix-summed once and shared by all
+    # momentum windows on it. Returns a (n_settings, n_series, n_periods, 2) array.
+    grid = [validate_windows(windows) for windows in grid]
+    n_periods, n_tickers = sbr.shape
+    result = np.full((len(grid), n_tickers, n_periods, 2), np.nan)
+    if not grid or n_periods == 0 or n_tickers == 0:
+        return result
+
+    valid = np.isfinite(sbr)
+    order = np.argsort(~valid, axis=0, kind="stable")
+    compact = np.take_along_axis(np.where(valid, sbr, np.nan), order, axis=0)
+
+    def means(values, windows):
+        prefix = _prefix_sums(values)
+        return {window: values.copy() if window == 1 else _prefix_mean(prefix, window) for window in windows}
+
+    def scatter(values):
+        out = np.full(values.shape, np.nan)
+        np.put_along_axis(out, order, values, axis=0)
+        out[~valid] = np.nan
+        return out.T
+
+    ratio_means = means(compact, {window for windows in grid for window in windows[:2]})
+    lines = {}
+    for i, (rs_short, rs_long, rm_short, rm_long) in enumerate(grid):
+        pair = (rs_short, rs_long)
+        if pair not in lines:
+            rs = 100 * ((ratio_means[rs_short] - ratio_means[rs_long]) / ratio_means[rs_long] + 1)
+            momentum_windows = {window for windows in grid if windows[:2] == pair for window in windows[2:]}
+            lines[pair] = (rs, scatter(rs), means(rs, momentum_windows))
+        rs, ratio, momentum_means = lines[pair]
+        rm = 100 * ((momentum_means[rm_short] - momentum_means[rm_long]) / momentum_means[rm_long] + 1)
+        result[i, :, :, 0] = ratio
+        result[i, :, :, 1] = scatter(rm)
+    return result
+
+
+def compute_rrg_sweep(prices, benchmark_prices, grid):
+    # compute_rrg_arrays for every windows tuple in `grid`: (n_settings, n_tickers, n_periods, 2)
+    prices = np.asarray(prices, dtype=np.float64)
+    benchmark_prices = np.asarray(benchmark_prices, dtype=np.float64)
+    return rrg_sweep_from_ratios(prices / benchmark_prices[:, None], grid)
+
+
+def latest_quadrants(rrg_data):
+    # Quadrant of each series' last point with both values, from a frame whose
+    # last column level is RRG_FIELDS; NaN-only series get "".
+    ratio = rrg_data.xs("RS-Ratio", axis=1, level=-1).ffill().iloc[-1]
+    momentum = rrg_data.xs("RS-Momentum", axis=1, level=-1).ffill().iloc[-1]
+    codes = quadrant_codes(ratio.to_numpy(), momentum.to_numpy())
+    return pd.Series([QUADRANTS[code] if code >= 0 else "" for code in codes], index=ratio.index)
+
+
+def quadrant_table(multi_frame):
+    # ticker x benchmark table of latest quadrants from compute_rrg_multi_frame
+    benchmarks = multi_frame.columns.get_level_values(0).unique()
+    tickers = multi_frame.columns.get_level_values(1).unique()
+    return latest_quadrants(multi_frame).unstack(level=0).reindex(index=tickers, columns=benchmarks)
+
+
+def rrg_replay_array(rrg_data, sectors):
+    # Compact float32 (dates, tickers, 2) copy of a (ticker, field) RRG frame, for
+    # replaying history by slicing instead of recomputing.
+    columns = pd.MultiIndex.from_product([sectors, RRG_FIELDS])
+    values = rrg_data.reindex(columns=columns).to_numpy(dtype=np.float32)
+    return values.reshape(len(rrg_data.index), len(sectors), 2)
+
+
+def resample_prices(data, timeframe):
+    if timeframe == "Weekly":
+        return data.resample('W-FRI').last()
+    return data
+
+
+def lookback_start(timeframe, end_date):
+    if timeframe == "Weekly":
+        return end_date - timedelta(weeks=100)
+    return end_date - timedelta(days=500)
+
+
+def lookback_bars(timeframe, end_date):
+    # About how many bars lookback_start() loads: weeks, or weekdays for Daily
+    start = lookback_start(timeframe, end_date)
+    if timeframe == "Weekly":
+        return (end_date - start).days // 7
+    return int(np.busday_count(start.date(), end_date.date()))
@@ -0,0 +1,185 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from rrg_core import DEFAULT_WINDOWS, RRG_FIELDS, compute_rrg_frame
+
+
+class RollingMean:
+    # Trailing mean of the last `window` values pushed, NaN until the window is
+    # full or while it holds a NaN (like rolling_mean). The sum is kept running,
+    # so a push costs O(1) however long the window is.
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._total = 0.0
+        self._nans = 0
+
+    def _pushed(self, value):
+        # (total, NaN count, length) of the window once `value` is pushed
+        total, nans, length = self._total, self._nans, len(self._values) + 1
+        if length > self.window:
+            oldest = self._values[0]
+            if math.isnan(oldest):
+                nans -= 1
+            else:
+                total -= oldest
+            length -= 1
+        if math.isnan(value):
+            nans += 1
+        else:
+            total += value
+        return total, nans, length
+
+    def _mean(self, total, nans, length):
+        return total / self.window if length == self.window and nans == 0 else math.nan
+
+    def push(self, value):
+        self._total, self._nans, length = self._pushed(value)
+        self._values.append(value)
+        if len(self._values) > self.window:
+            self._values.popleft()
+        return self._mean(self._total, self._nans, length)
+
+    def peek(self, value):
+        # The mean push(value) would return, without pushing it
+        return self._mean(*self._pushed(value))
+
+
+class IncrementalRRG:
+    # Rolling-window state for one (ticker, benchmark) pair. Each committed bar
+    # costs O(1); the result matches compute_rrg_frame on the same aligned
+    # history. Bars where either price is missing are skipped, like the
+    # per-ticker alignment in the batch path.
+
+    def __init__(self, ratio_windows=DEFAULT_WINDOWS[:2], momentum_windows=DEFAULT_WINDOWS[2:]):
+        self.ratio_windows = ratio_windows
+        self.momentum_windows = momentum_windows
+        self._ratio_means = [RollingMean(window) for window in ratio_windows]
+        self._momentum_means = [RollingMean(window) for window in momentum_windows]
+        self.last_date = None
+
+    def _step(self, price, benchmark_price, commit):
+        sbr = price / benchmark_price
+        rs1, rs2 = (mean.push(sbr) if commit else mean.peek(sbr) for mean in self._ratio_means)
+        rs = 100 * ((rs1 - rs2) / rs2 + 1)
+        # Leading NaN ratios still occupy the momentum window, as in the batch path
+        rm1, rm2 = (mean.push(rs) if commit else mean.peek(rs) for mean in self._momentum_means)
+        return rs, 100 * ((rm1 - rm2) / rm2 + 1)
+
+    def update(self, date, price, benchmark_price):
+        # Commit a finished bar. Returns (rs_ratio, rs_momentum), or None when the
+        # bar is not aligned (missing price) or not newer than the last one.
+        if math.isnan(price) or math.isnan(benchmark_price):
+            return None
+        if self.last_date is not None and date <= self.last_date:
+            return None
+        self.last_date = date
+        return self._step(price, benchmark_price, commit=True)
+
+    def peek(self, price, benchmark_price):
+        # RRG point for a still-forming (intraday) bar, without committing it.
+        if math.isnan(price) or math.isnan(benchmark_price):
+            return None
+        return self._step(price, benchmark_price, commit=False)
+
+    def extend(self, prices, benchmark_prices):
+        # Feed aligned Series; returns a frame of the newly emitted points only.
+        if self.last_date is not None:
+            new_bars = prices.index > self.last_date
+            prices, benchmark_prices = prices[new_bars], benchmark_prices[new_bars]
+        rows = {}
+        for date, price, benchmark_price in zip(prices.index, prices.to_numpy(), benchmark_prices.to_numpy()):
+            point = self.update(date, price, benchmark_price)
+            if point is not None:
+                rows[date] = point
+        return pd.DataFrame.from_dict(rows, orient="index", columns=RRG_FIELDS)
+
+
+class IncrementalRRGBook:
+    # One IncrementalRRG per (ticker, benchmark, timeframe). update() commits every
+    # bar except the latest one, which is treated as still forming (the current
+    # week for Weekly, today's session for Daily) and returned via peek(). Each
+    # calculator picks up after its own last committed bar, so a ticker missing
+    # from one call (or with no price yet) catches up on the next.
+
+    def __init__(self, **windows):
+        self.windows = windows
+        self.calculators = {}
+
+    def prime(self, data, benchmark, sectors, timeframe):
+        # Fresh calculators for `sectors`, with every closed bar of `data` committed.
+        # Only the last bars that still reach into a rolling window are fed in: the
+        # next point needs the last (long ratio window - 1) ratios, and the last
+        # (long momentum window - 1) RS-Ratios, each over a full ratio window.
+        for sector in sectors:
+            self.calculators[(sector, benchmark, timeframe)] = IncrementalRRG(**self.windows)
+        closed = data.iloc[:-1]
+        if closed.empty or not sectors:
+            return
+        ratio_windows = self.windows.get("ratio_windows", DEFAULT_WINDOWS[:2])
+        momentum_windows = self.windows.get("momentum_windows", DEFAULT_WINDOWS[2:])
+        needed = max(ratio_windows) + max(momentum_windows) - 2
+        valid = closed[sectors].notna().to_numpy() & closed[[benchmark]].notna().to_numpy()
+        # Row of each ticker's needed-th last aligned bar, or 0 if it has fewer
+        reached = np.cumsum(valid[::-1], axis=0) >= needed
+        first = np.where(reached.any(axis=0), len(closed) - 1 - reached.argmax(axis=0), 0)
+        self.update(data.iloc[int(first.min()):], benchmark, sectors, timeframe)
+
+    def frame(self, data, benchmark, sectors, timeframe, previous=None):
+        # compute_rrg_frame(data, benchmark, sectors) for a book that produced
+        # `previous` from an earlier `data`: only the bars after it are computed,
+        # the rest is taken from `previous`. Without `previous` the whole frame is
+        # computed in one batch and the book primed from it.
+        windows = (*self.windows.get("ratio_windows", DEFAULT_WINDOWS[:2]),
+                   *self.windows.get("momentum_windows", DEFAULT_WINDOWS[2:]))
+        if previous is None or data.empty:
+            self.prime(data, benchmark, sectors, timeframe)
+            return compute_rrg_frame(data, benchmark, sectors, windows)
+        committed, live = self.update(data, benchmark, sectors, timeframe)
+        columns = pd.MultiIndex.from_product([sectors, RRG_FIELDS])
+        # previous' last row was a forming bar; the committed points replace it
+        rrg_data = committed.combine_first(previous.iloc[:-1].astype(np.float64))
+        rrg_data.loc[data.index[-1]] = live.reindex(sectors).to_numpy().reshape(-1)
+        return rrg_data.reindex(index=data.index, columns=columns)
+
+    def update(self, data, benchmark, sectors, timeframe):
+        # `data` is the (already resampled) close matrix. Returns the newly committed
+        # points as a (ticker, field) frame like compute_rrg_frame, and the live
+        # point of every ticker for the forming bar.
+        if data.empty:
+            return pd.DataFrame(), pd.DataFrame(columns=RRG_FIELDS)
+        closed, forming = data.iloc[:-1], data.iloc[-1]
+        calculators = []
+        for sector in sectors:
+            key = (sector, benchmark, timeframe)
+            if key not in self.calculators:
+                self.calculators[key] = IncrementalRRG(**self.windows)
+            calculators.append(self.calculators[key])
+        last_dates = [calculator.last_date for calculator in calculators]
+        if any(date is None for date in last_dates):
+            new_rows = closed
+        else:
+            new_rows = closed[closed.index > min(last_dates)]
+
+        dates = new_rows.index
+        prices = new_rows[sectors].to_numpy(dtype=np.float64)
+        benchmark_prices = new_rows[benchmark].to_numpy(dtype=np.float64)
+        committed = np.full((len(dates), len(sectors), 2), np.nan)
+        live = np.full((len(sectors), 2), np.nan)
+        for j, (sector, calculator) in enumerate(zip(sectors, calculators)):
+            # update() ignores bars at or before the calculator's own last committed bar
+            for i, (date, price, benchmark_price) in enumerate(zip(dates, prices[:, j], benchmark_prices)):
+                point = calculator.update(date, price, benchmark_price)
+                if point is not None:
+                    committed[i, j] = point
+            point = calculator.peek(forming[sector], forming[benchmark])
+            if point is not None:
+                live[j] = point
+
+        columns = pd.MultiIndex.from_product([sectors, RRG_FIELDS])
+        committed = pd.DataFrame(committed.reshape(len(dates), 2 * len(sectors)), index=dates, columns=columns)
+        return committed, pd.DataFrame(live, index=sectors, columns=RRG_FIELDS)
@@ -0,0 +1,177 @@
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from rrg_core import QUADRANTS, RRG_FIELDS, quadrant_codes
+
+DEFAULT_EVENT_DB = os.environ.get(
+    "RRG_EVENT_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rrg_events.sqlite")
+)
+
+# The rotations we watch the Monitoring / Screener lists for
+ALERT_TRANSITIONS = {("Improving", "Leading"), ("Leading", "Weakening")}
+
+EVENT_COLUMNS = ["ticker", "date", "from_quadrant", "to_quadrant", "rs_ratio", "rs_momentum", "heading", "velocity", "alert"]
+
+
+def _ffill_rows(values, valid):
+    # Forward-fill along axis 0 (dates) where `valid` is False, column by column.
+    rows = np.where(valid, np.arange(len(values))[:, None], -1)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    filled = values[np.maximum(rows, 0), np.arange(values.shape[1])]
+    return filled, rows >= 0
+
+
+def scan_transitions(rrg_data, sectors, after=None):
+    # Quadrant changes on the dates after `after` (only the last date when None)
+    # for every ticker at once. Each point is compared with the ticker's previous valid point, so missing bars
+    # do not create or hide transitions. heading is the direction of travel in
+    # degrees (0 = towards higher RS-Ratio, 90 = towards higher RS-Momentum) and
+    # velocity the distance moved since the previous point.
+    sectors = list(dict.fromkeys(sectors))
+    columns = pd.MultiIndex.from_product([sectors, RRG_FIELDS])
+    rrg_data = rrg_data.loc[:, ~rrg_data.columns.duplicated()]
+    replay = rrg_data.reindex(columns=columns).to_numpy(dtype=np.float64).reshape(len(rrg_data.index), len(sectors), 2)
+    valid = np.isfinite(replay).all(axis=2)
+    codes = np.where(valid, quadrant_codes(replay[:, :, 0], replay[:, :, 1]), -1)
+
+    filled_x, has_prev = _ffill_rows(replay[:, :, 0], valid)
+    filled_y, _ = _ffill_rows(replay[:, :, 1], valid)
+    filled_codes, _ = _ffill_rows(codes, valid)
+    prev_x = np.vstack([np.full((1, len(sectors)), np.nan), filled_x[:-1]])
+    prev_y = np.vstack([np.full((1, len(sectors)), np.nan), filled_y[:-1]])
+    prev_codes = np.vstack([np.full((1, len(sectors)), -1), filled_codes[:-1]])
+    prev_codes = np.where(np.vstack([np.zeros((1, len(sectors)), bool), has_prev[:-1]]), prev_codes, -1)
+
+    changed = valid & (prev_codes >= 0) & (codes != prev_codes)
+    if after is None:
+        changed[:-1] = False
+    else:
+        changed[rrg_data.index <= pd.Timestamp(after)] = False
+    date_idx, ticker_idx = np.nonzero(changed)
+
+    dx = replay[date_idx, ticker_idx, 0] - prev_x[date_idx, ticker_idx]
+    dy = replay[date_idx, ticker_idx, 1] - prev_y[date_idx, ticker_idx]
+    quadrant_names = np.array(QUADRANTS, dtype=object)
+    events = pd.DataFrame({
+        "ticker": np.array(sectors, dtype=object)[ticker_idx],
+        "date": rrg_data.index[date_idx],
+        "from_quadrant": quadrant_names[prev_codes[date_idx, ticker_idx]],
+        "to_quadrant": quadrant_names[codes[date_idx, ticker_idx]],
+        "rs_ratio": replay[date_idx, ticker_idx, 0],
+        "rs_momentum": replay[date_idx, ticker_idx, 1],
+        "heading": np.degrees(np.arctan2(dy, dx)),
+        "velocity": np.hypot(dx, dy),
+    }, columns=EVENT_COLUMNS[:-1])
+    events["alert"] = [(a, b) in ALERT_TRANSITIONS for a, b in zip(events["from_quadrant"], events["to_quadrant"])]
+    return events
+
+
+class EventLog:
+    # SQLite log of quadrant transitions. Only closed bars are scanned (dated before
+    # the scan's day, so today's session and the current week are left until they
+    # finish), and each (universe, benchmark, timeframe) remembers the last bar it
+    # scanned, so a tick picks up every bar closed since, including any missed
+    # while the warmer was down. Re-logging a bar keeps its latest values.
+
+    def __init__(self, path=DEFAULT_EVENT_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rrg_events (
+                    universe TEXT NOT NULL,
+                    benchmark TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    from_quadrant TEXT NOT NULL,
+                    to_quadrant TEXT NOT NULL,
+                    rs_ratio REAL,
+                    rs_momentum REAL,
+                    heading REAL,
+                    velocity REAL,
+                    alert INTEGER NOT NULL,
+                    detected_at TEXT NOT NULL,
+                    UNIQUE (universe, benchmark, timeframe, ticker, date)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS rrg_events_date ON rrg_events (date)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rrg_scans (
+                    universe TEXT NOT NULL,
+                    benchmark TEXT NOT NULL,
+                    timeframe TEXT NOT NULL,
+                    scanned_through TEXT NOT NULL,
+                    PRIMARY KEY (universe, benchmark, timeframe)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def log(self, universe, benchmark, timeframe, events):
+        with self._lock, self._connect() as conn:
+            return self._insert(conn, universe, benchmark, timeframe, events)
+
+    def _insert(self, conn, universe, benchmark, timeframe, events):
+        if events.empty:
+            return 0
+        detected_at = datetime.now().isoformat(timespec="seconds")
+        rows = [
+            (universe, benchmark, timeframe, row.ticker, pd.Timestamp(row.date).strftime("%Y-%m-%d"),
+             row.from_quadrant, row.to_quadrant, float(row.rs_ratio), float(row.rs_momentum),
+             float(row.heading), float(row.velocity), int(row.alert), detected_at)
+            for row in events.itertuples(index=False)
+        ]
+        before = conn.total_changes
+        conn.executemany("INSERT OR REPLACE INTO rrg_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return conn.total_changes - before
+
+    def scan(self, universe, benchmark, timeframe, rrg_data, sectors, as_of=None):
+        # Logs the transitions on bars closed since the last scan of this key; the
+        # first scan of a key looks at its last closed bar only
+        as_of = pd.Timestamp(as_of if as_of is not None else datetime.now()).normalize()
+        closed = rrg_data[rrg_data.index < as_of]
+        if closed.empty:
+            return 0
+        key = (universe, benchmark, timeframe)
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT scanned_through FROM rrg_scans WHERE universe = ? AND benchmark = ? AND timeframe = ?",
+                               key).fetchone()
+            after = pd.Timestamp(row[0]) if row else None
+            if after is not None and closed.index[-1] <= after:
+                return 0
+            logged = self._insert(conn, universe, benchmark, timeframe, scan_transitions(closed, sectors, after))
+            conn.execute("INSERT OR REPLACE INTO rrg_scans VALUES (?, ?, ?, ?)",
+                         key + (closed.index[-1].strftime("%Y-%m-%d"),))
+            return logged
+
+    def recent(self, limit=50, alerts_only=False):
+        query = "SELECT * FROM rrg_events"
+        if alerts_only:
+            query += " WHERE alert = 1"
+        query += " ORDER BY date DESC, detected_at DESC LIMIT ?"
+        with self._connect() as conn:
+            return pd.read_sql_query(query, conn, params=(limit,))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show recent RRG quadrant transitions from the event log")
+    parser.add_argument("--db", default=DEFAULT_EVENT_DB)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--alerts-only", action="store_true")
+    args = parser.parse_args(argv)
+    events = EventLog(args.db).recent(args.limit, args.alerts_only)
+    print(events.to_string(index=False) if not events.empty else "No events logged.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,459 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+from calendar_align import align_benchmarks, align_universe, stale_message
+from instrumentation import METRICS
+from rrg_core import (DEFAULT_WINDOWS, compute_rrg_multi_frame, lookback_start, quadrant_table, resample_prices,
+                      validate_windows)
+from universe_cache import compact_frame, frame_nbytes
+from universes import PORTFOLIO_BENCHMARKS, REGISTRY, UniverseError, resolve_universe
+
+logger = logging.getLogger(__name__)
+
+# When set, the Streamlit app is a thin client of the service at this URL
+SERVICE_URL = os.environ.get("RRG_SERVICE_URL")
+DEFAULT_PORT = int(os.environ.get("RRG_SERVICE_PORT", "8765"))
+
+
+def load_universe(ticker_cache, universe, sector, timeframe, custom_tickers=None, custom_benchmark=None):
+    # Resolve and load one universe. Returns (data, benchmark, sectors, sector_names,
+    # freshness) with the closes aligned by calendar_align, plus the (level, message)
+    # pairs the page shows for it.
+    messages = []
+    end_date = datetime.now()
+    start_date = lookback_start(timeframe, end_date)
+
+    try:
+        benchmark, sectors, sector_names = resolve_universe(universe, sector, custom_tickers, custom_benchmark)
+    except UniverseError as e:
+        messages.append(("error", str(e)))
+        return (None, None, None, None, None), messages
+
+    try:
+        tickers_to_download = [benchmark] + sectors
+        messages.append(("info", f"Attempting to download data for: {', '.join(tickers_to_download)}"))
+
+        data = ticker_cache.get_closes(tickers_to_download, start_date, end_date)
+        aliases = data.attrs.get("aliases", {})
+
+        # Check the actual date range of the downloaded data
+        actual_start_date = data.index.min()
+        actual_end_date = data.index.max()
+
+        messages.append(("info", f"Data available from {actual_start_date.date()} to {actual_end_date.date()}"))
+
+        for ticker in tickers_to_download:
+            if ticker in aliases:
+                messages.append(("info", f"Using {aliases[ticker]} as a proxy for {ticker}"))
+
+        missing_tickers = set(tickers_to_download) - set(data.columns)
+        if missing_tickers:
+            messages.append(("warning", f"The following tickers could not be downloaded: {', '.join(missing_tickers)}"))
+
+        if data.empty:
+            messages.append(("error", f"No data available for the selected universe and sector."))
+            return (None, benchmark, sectors, sector_names, None), messages
+
+        data = data.dropna(axis=1, how='all')
+
+        if benchmark not in data.columns:
+            messages.append(("error", f"No data available for the benchmark {benchmark}. Please choose a different benchmark."))
+            return (None, benchmark, sectors, sector_names, None), messages
+
+        valid_sectors = [s for s in sectors if s in data.columns]
+        if len(valid_sectors) == 0:
+            messages.append(("error", "No valid sector data available. Please check your input and try again."))
+            return (None, benchmark, sectors, sector_names, None), messages
+
+        sectors = valid_sectors
+        sector_names = {s: sector_names[s] for s in valid_sectors if s in sector_names}
+
+        # One shared calendar for the whole universe; replaces the single end-date check
+        data, freshness = align_universe(data, benchmark, sectors, as_of=end_date)
+        stale = stale_message(freshness)
+        if stale:
+            messages.append(("warning", stale))
+
+    except Exception as e:
+        messages.append(("error", f"Error fetching data: {str(e)}"))
+        return (None, benchmark, sectors, sector_names, None), messages
+
+    messages.append(("success", f"Successfully downloaded data for {len(data.columns)} tickers."))
+    return (compact_frame(data), benchmark, sectors, sector_names, freshness), messages
+
+
+class SingleFlight:
+    # Concurrent calls with the same key share one execution: the first caller runs
+    # it, the others wait for its result (or exception).
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.merged = 0
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.merged += 1
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class RRGService:
+    # Owns downloads, caching and RRG computation for every session. Identical
+    # in-flight requests are merged, and the work itself runs on a bounded pool so
+    # a burst of different universes cannot oversubscribe the process. It also
+    # reports the warmer's status and the transitions in its event log.
+
+    def __init__(self, ticker_cache, downloader, rrg_cache, universe_cache, warmer=None, max_workers=4, event_log=None):
+        self.ticker_cache = ticker_cache
+        self.downloader = downloader
+        self.rrg_cache = rrg_cache
+        self.universe_cache = universe_cache
+        self.warmer = warmer
+        self.event_log = event_log
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rrg-service")
+        self._flight = SingleFlight()
+
+    def _run(self, key, func, *args):
+        return self._flight.do(key, lambda: self._pool.submit(func, *args).result())
+
+    def _compute(self, key, universe, sector, timeframe, custom_tickers, custom_benchmark, windows):
+        cached = self.universe_cache.get(key)
+        if cached is None:
+            cached = load_universe(self.ticker_cache, universe, sector, timeframe,
+                                   custom_tickers, custom_benchmark)
+            self.universe_cache.put(key, cached, frame_nbytes(cached[0][0]))
+        (data, benchmark, sectors, sector_names, freshness), messages = cached
+
+        rrg_data = None
+        if data is not None:
+            with METRICS.timer("rrg") as record:
+                # The warmer only precomputes the default windows
+                if self.warmer is not None and windows == DEFAULT_WINDOWS:
+                    rrg_data = self.warmer.get_result(universe, sector, timeframe, benchmark, sectors, data.index.max())
+                METRICS.count("warm_result_hit" if rrg_data is not None else "warm_result_miss")
+                if rrg_data is None:
+                    rrg_data = self.rrg_cache.compute_frame(resample_prices(data, timeframe), benchmark, sectors, timeframe,
+                                                            windows)
+                record.rows = len(rrg_data)
+        return {
+            "messages": messages,
+            "prices": data,
+            "benchmark": benchmark,
+            "sectors": sectors,
+            "sector_names": sector_names,
+            "rrg": rrg_data,
+            "freshness": freshness,
+        }
+
+    def rrg(self, universe, sector, timeframe, custom_tickers=None, custom_benchmark=None, windows=DEFAULT_WINDOWS,
+            price_rows=None):
+        # price_rows keeps only the last rows of the closes (all of them when None)
+        windows = validate_windows(windows)
+        key = (universe, sector, timeframe, tuple(custom_tickers) if custom_tickers else None, custom_benchmark)
+        result = self._run(("rrg", windows) + key, self._compute, key, universe, sector, timeframe, custom_tickers,
+                           custom_benchmark, windows)
+        if price_rows and result["prices"] is not None:
+            result = {**result, "prices": result["prices"].iloc[-price_rows:]}
+        return result
+
+    def benchmark_frames(self, tickers, timeframe, windows=DEFAULT_WINDOWS):
+        # (benchmark, ticker, field) RRG frame of the tickers against every portfolio
+        # benchmark, from one download, one alignment and one broadcast computation.
+        # The tickers are filled as load_universe() fills them against each benchmark,
+        # so .xs(benchmark, axis=1) matches the chart on that benchmark's dates.
+        windows = validate_windows(windows)
+        end_date = datetime.now()
+        closes = self.ticker_cache.get_closes(PORTFOLIO_BENCHMARKS + tickers, lookback_start(timeframe, end_date), end_date)
+        closes = closes.dropna(axis=1, how="all")
+        benchmarks = [b for b in PORTFOLIO_BENCHMARKS if b in closes.columns]
+        tickers = [t for t in dict.fromkeys(tickers) if t in closes.columns and t not in benchmarks]
+        data, _ = align_benchmarks(closes, benchmarks, tickers)
+        return compute_rrg_multi_frame(compact_frame(data), benchmarks, tickers, windows, timeframe)
+
+    def _quadrants(self, tickers, timeframe, windows):
+        # Latest quadrant of every ticker against every portfolio benchmark
+        return quadrant_table(self.benchmark_frames(tickers, timeframe, windows))
+
+    def quadrants(self, tickers, timeframe, windows=DEFAULT_WINDOWS):
+        windows = validate_windows(windows)
+        return self._run(("quadrants", tuple(tickers), timeframe, windows), self._quadrants, list(tickers), timeframe, windows)
+
+    def warm_status(self):
+        # The warmer's per-universe rows and its next scheduled run (None when not warming)
+        if self.warmer is None:
+            return {"next_run": None, "rows": []}
+        return {"next_run": self.warmer.next_run, "rows": self.warmer.status_rows()}
+
+    def events(self, limit=50, alerts_only=False):
+        if self.event_log is None:
+            return pd.DataFrame()
+        return self.event_log.recent(limit, alerts_only)
+
+    def clear(self):
+        self.universe_cache.clear()
+        self.ticker_cache.clear()
+
+    def stats(self):
+        return {
+            "universe_cache": self.universe_cache.stats(),
+            "ticker_cache": self.ticker_cache.stats(),
+            "rrg_result_cache": self.rrg_cache.stats(),
+            "single_flight": {"merged": self._flight.merged},
+        }
+
+
+def encode_frame(frame, rows=None):
+    # {"index", "columns", "values"} with ISO dates and NaN as null; tuple columns become lists
+    if frame is None:
+        return None
+    if rows is not None:
+        frame = frame.iloc[-rows:]
+    numeric = all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes)
+    values = frame.to_numpy(dtype=np.float64 if numeric else object).astype(object)
+    values[pd.isna(frame).to_numpy()] = None
+    return {
+        "index": [value.isoformat() if hasattr(value, "isoformat") else value for value in frame.index],
+        "columns": [list(column) if isinstance(column, tuple) else column for column in frame.columns],
+        "values": values.tolist(),
+        "datetime_index": isinstance(frame.index, pd.DatetimeIndex),
+        "numeric": numeric,
+    }
+
+
+def decode_frame(payload, compact=True):
+    # compact=False keeps float64 values, for frames the caller shows rather than caches
+    if payload is None:
+        return None
+    columns = payload["columns"]
+    if columns and isinstance(columns[0], list):
+        columns = pd.MultiIndex.from_tuples([tuple(column) for column in columns])
+    index = pd.DatetimeIndex(payload["index"]) if payload["datetime_index"] else payload["index"]
+    if not payload["numeric"]:
+        return pd.DataFrame(payload["values"], index=index, columns=columns)
+    frame = pd.DataFrame(payload["values"], index=index, columns=columns, dtype=float)
+    return compact_frame(frame) if compact else frame
+
+
+class ServiceError(Exception):
+    pass
+
+
+class ServiceClient:
+    # Same rrg() / quadrants() / warm_status() / events() / clear() / stats() as
+    # RRGService, over HTTP. Only the last `history` RRG rows are transferred.
+
+    def __init__(self, url=SERVICE_URL, timeout=120.0, history=None):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.history = history
+
+    def _call(self, path, payload=None):
+        # Raises ServiceError when the service is unreachable, too slow, or answers with an error
+        data = None if payload is None else json.dumps(payload).encode()
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                detail = json.loads(e.read())["error"]
+            except (ValueError, KeyError, TypeError):
+                detail = e.reason
+            raise ServiceError(f"RRG service {path} failed with HTTP {e.code}: {detail}") from e
+        except (OSError, ValueError) as e:
+            # URLError and TimeoutError are OSErrors; ValueError is a reply that is not JSON
+            raise ServiceError(f"RRG service at {self.url} did not answer {path}: {e}") from e
+
+    def rrg(self, universe, sector, timeframe, custom_tickers=None, custom_benchmark=None, windows=DEFAULT_WINDOWS,
+            price_rows=None):
+        result = self._call("/rrg", {
+            "universe": universe, "sector": sector, "timeframe": timeframe,
+            "custom_tickers": custom_tickers, "custom_benchmark": custom_benchmark, "windows": list(windows),
+            "history": self.history, "price_rows": price_rows,
+        })
+        result["messages"] = [tuple(message) for message in result["messages"]]
+        result["prices"] = decode_frame(result["prices"], compact=False)
+        result["rrg"] = decode_frame(result["rrg"])
+        result["freshness"] = decode_frame(result["freshness"])
+        return result
+
+    def quadrants(self, tickers, timeframe, windows=DEFAULT_WINDOWS):
+        return decode_frame(self._call("/quadrants", {"tickers": list(tickers), "timeframe": timeframe,
+                                                      "windows": list(windows)}))
+
+    def warm_status(self):
+        status = self._call("/warm_status")
+        if status["next_run"]:
+            status["next_run"] = datetime.fromisoformat(status["next_run"])
+        return status
+
+    def events(self, limit=50, alerts_only=False):
+        return decode_frame(self._call("/events", {"limit": limit, "alerts_only": alerts_only}))
+
+    def clear(self):
+        self._call("/clear", {})
+
+    def stats(self):
+        return self._call("/stats")
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="application/json"):
+            data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send(200, service.stats())
+            elif self.path == "/metrics":
+                self._send(200, METRICS.prometheus_text(service.stats()), "text/plain; version=0.0.4")
+            elif self.path == "/warm_status":
+                status = service.warm_status()
+                next_run = status["next_run"]
+                self._send(200, {**status, "next_run": next_run.isoformat() if next_run else None})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError as e:
+                self._send(400, {"error": f"malformed request body: {e}"})
+                return
+            try:
+                if self.path == "/rrg":
+                    result = service.rrg(request["universe"], request.get("sector"), request["timeframe"],
+                                         request.get("custom_tickers"), request.get("custom_benchmark"),
+                                         request.get("windows") or DEFAULT_WINDOWS, request.get("price_rows"))
+                    self._send(200, {
+                        **result,
+                        "prices": encode_frame(result["prices"]),
+                        "rrg": encode_frame(result["rrg"], request.get("history")),
+                        "freshness": encode_frame(result["freshness"]),
+                    })
+                elif self.path == "/quadrants":
+                    self._send(200, encode_frame(service.quadrants(request["tickers"], request["timeframe"],
+                                                                   request.get("windows") or DEFAULT_WINDOWS)))
+                elif self.path == "/events":
+                    self._send(200, encode_frame(service.events(request.get("limit", 50), request.get("alerts_only", False))))
+                elif self.path == "/clear":
+                    service.clear()
+                    self._send(200, {"status": "cleared"})
+                else:
+                    self._send(404, {"error": f"unknown path {self.path}"})
+            except Exception as e:
+                logger.exception("Request to %s failed", self.path)
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return Handler
+
+
+def serve(service, host="127.0.0.1", port=DEFAULT_PORT):
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def fake_downloader():
+    # Synthetic closes for every preset symbol and bundled portfolio, so the service
+    # (and the app pointed at it) runs without network access.
+    from downloader import Downloader
+    from fake_data import CannedPrices, synthetic_closes
+    from portfolios import load_bundled_portfolio
+    from prefetch import preset_universes
+
+    symbols = REGISTRY.fetch_plan(preset_universes(load_bundled_portfolio))
+    symbols += [b for b in PORTFOLIO_BENCHMARKS if b not in symbols]
+    return Downloader(CannedPrices(synthetic_closes(symbols)), sleep=lambda seconds: None)
+
+
+def build_service(store_dir=None, fake=False, warm=True, max_workers=4):
+    from downloader import Downloader
+    from portfolios import PortfolioLoader
+    from prefetch import UniverseWarmer
+    from price_store import DEFAULT_STORE_DIR, PriceStore
+    from rrg_cache import RRGResultCache
+    from rrg_scanner import EventLog
+    from ticker_cache import TickerCache
+    from universe_cache import UniverseCache
+
+    downloader = fake_downloader() if fake else Downloader()
+    store_dir = store_dir or (tempfile.mkdtemp(prefix="rrg-fake-store-") if fake else DEFAULT_STORE_DIR)
+    ticker_cache = TickerCache(PriceStore(store_dir, download=downloader))
+    universe_cache = UniverseCache()
+    event_log = EventLog()
+    warmer = None
+    if warm:
+        loader = PortfolioLoader()
+        warmer = UniverseWarmer(ticker_cache, lambda portfolio_type: loader.load(portfolio_type)[0],
+                                on_warm=universe_cache.clear, event_log=event_log).start()
+    return RRGService(ticker_cache, downloader, RRGResultCache(), universe_cache, warmer, max_workers, event_log)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Shared RRG compute service for the Streamlit app (set RRG_SERVICE_URL to use it)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--store", help="price store directory")
+    parser.add_argument("--fake", action="store_true", help="serve synthetic prices instead of downloading")
+    parser.add_argument("--no-warm", action="store_true", help="do not prefetch the preset universes")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    service = build_service(args.store, args.fake, not args.no_warm, args.workers)
+    server = serve(service, args.host, args.port)
+    logger.info("RRG service listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from rrg_core import DEFAULT_CLAMP, DEFAULT_WINDOWS, compute_rrg_sweep, quadrant_codes, resample_prices, sweep_grid
+
+SWEEP_COLUMNS = ["ratio_short", "ratio_long", "momentum_short", "momentum_long",
+                 "points", "transitions_per_100_bars", "in_clamp_pct"]
+
+
+def _windows_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def sweep_summary(data, benchmark, sectors, timeframe, grid, clamp=DEFAULT_CLAMP):
+    # One row per windows setting: how many RRG points it yields, how often tickers
+    # change quadrant (whipsaw), and how much of the tails fit inside the chart clamp.
+    data = resample_prices(data, timeframe)
+    values = compute_rrg_sweep(data[sectors].to_numpy(dtype=np.float64), data[benchmark].to_numpy(dtype=np.float64), grid)
+    x, y = values[..., 0], values[..., 1]
+    has_point = np.isfinite(x) & np.isfinite(y)
+    codes = quadrant_codes(x.reshape(-1), y.reshape(-1)).reshape(x.shape)
+    changed = (codes[..., 1:] != codes[..., :-1]) & (codes[..., 1:] >= 0) & (codes[..., :-1] >= 0)
+    low, high = clamp
+    inside = has_point & (x >= low) & (x <= high) & (y >= low) & (y <= high)
+
+    points = has_point.sum(axis=(1, 2))
+    rows = []
+    for i, windows in enumerate(grid):
+        rows.append(list(windows) + [
+            int(points[i]),
+            100 * changed[i].sum() / points[i] if points[i] else np.nan,
+            100 * inside[i].sum() / points[i] if points[i] else np.nan,
+        ])
+    return pd.DataFrame(rows, columns=SWEEP_COLUMNS)
+
+
+def main(argv=None):
+    from rrg_service import build_service
+
+    parser = argparse.ArgumentParser(description="Compare RRG window settings for a universe in one vectorized pass")
+    parser.add_argument("universe", help="universe name as in the app, e.g. WORLD or FX")
+    parser.add_argument("--sector", help="US sector / HK sub-index for those universes")
+    parser.add_argument("--timeframe", choices=["Weekly", "Daily"], default="Weekly")
+    parser.add_argument("--ratio-short", default="5,8,10,12,14")
+    parser.add_argument("--ratio-long", default="20,26,30,40")
+    parser.add_argument("--momentum-short", default="1,2")
+    parser.add_argument("--momentum-long", default="4,6,8")
+    parser.add_argument("--clamp", default=",".join(str(limit) for limit in DEFAULT_CLAMP), help="chart axis limits, e.g. 80,120")
+    parser.add_argument("--store", help="price store directory")
+    parser.add_argument("--fake", action="store_true", help="use synthetic prices instead of downloading")
+    parser.add_argument("--output", help="also write the table to this .csv")
+    args = parser.parse_args(argv)
+
+    grid = sweep_grid(_windows_list(args.ratio_short), _windows_list(args.ratio_long),
+                      _windows_list(args.momentum_short), _windows_list(args.momentum_long))
+    service = build_service(args.store, args.fake, warm=False)
+    result = service.rrg(args.universe, args.sector, args.timeframe)
+    for level, message in result["messages"]:
+        print(f"{level}: {message}", file=sys.stderr)
+    if result["prices"] is None:
+        return 1
+
+    summary = sweep_summary(result["prices"], result["benchmark"], result["sectors"], args.timeframe, grid,
+                            tuple(_windows_list(args.clamp)))
+    summary["default"] = [tuple(windows) == DEFAULT_WINDOWS for windows in grid]
+    print(f"{args.universe} {args.timeframe}: {len(result['sectors'])} tickers vs {result['benchmark']}, {len(grid)} settings")
+    print(summary.round(2).to_string(index=False))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,52 +1,38 @@
+import os
 import streamlit as st
-import yfinance as yf
-import pandas as pd
 import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-from streamlit.runtime.scriptrunner import RerunData, RerunException
-import streamlit.components.v1 as components
+from datetime import datetime
+from rrg_core import (DEFAULT_CLAMP, DEFAULT_WINDOWS, QUADRANTS, get_quadrant, lookback_bars, quadrant_codes, resample_prices,
+                      rrg_replay_array)
+from portfolios import GitHubFetchError, PortfolioLoader, normalize_ticker
+from instrumentation import METRICS
+from universes import PORTFOLIO_BENCHMARKS, PORTFOLIO_UNIVERSES, REGISTRY
 
 # Set page config to wide layout
 st.set_page_config(layout="wide", page_title="Jason's Relative Rotation Graph (RRG) ")
 
-class GitHubFetchError(Exception):
-    pass
-
-def fetch_portfolio_from_github(url):
-    try:
-        import requests
-    except ImportError:
-        raise GitHubFetchError("The 'requests' library is not installed. Please install it to fetch the portfolio from GitHub.")
-    
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raises a HTTPError if the status is 4xx, 5xx
-        tickers = [line.strip() for line in response.text.split('\n') if line.strip()]
-        if not tickers:
-            raise GitHubFetchError("No tickers found in the GitHub file.")
-        return tickers
-    except requests.RequestException as e:
-        raise GitHubFetchError(f"Failed to fetch portfolio from GitHub: {e}")
+@st.cache_resource
+def get_portfolio_loader():
+    return PortfolioLoader()
 
 def get_preset_portfolio(portfolio_type):
-    urls = {
-        "Existing": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/Existing%20Portfolio.txt",
-        "Monitoring": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/Monitoring%20Portfolio.txt",
-        "US": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/US%20Portfolio.txt",
-        "Screener": "https://raw.githubusercontent.com/jasonckb/RRG_Jason/main/Screener%20List.txt"
-    }
     try:
-        return fetch_portfolio_from_github(urls[portfolio_type])
+        tickers, source = get_portfolio_loader().load(portfolio_type)
     except GitHubFetchError as e:
         st.error(str(e))
         st.error(f"Unable to load {portfolio_type} portfolio. Please check your internet connection or try again later.")
-        return None
+        return []
+    if source in ("cached", "bundled"):
+        st.warning(f"GitHub is unavailable; showing the {source} copy of the {portfolio_type} portfolio.")
+    return tickers
 
 def refresh_data():
     try:
-        # Clear all cached data
-        st.cache_data.clear()
+        # Clear the service's cached prices and results; the on-disk price store is
+        # kept, so the re-fetch below only downloads bars after each ticker's last stored date
+        get_rrg_service().clear()
         
         # Re-fetch data for the current universe
         universe = st.session_state.get('selected_universe', 'WORLD')
@@ -64,255 +50,223 @@ def refresh_data():
         st.error(f"An error occurred while refreshing data: {str(e)}")
         st.session_state.data_refreshed = False
 
-@st.cache_data
-def calculate_rrg_values(data, benchmark):
-    aligned_data = pd.concat([data, benchmark], axis=1).dropna()
-    
-    data = aligned_data.iloc[:, 0]
-    benchmark = aligned_data.iloc[:, 1]
-
-    sbr = data / benchmark
-    rs1 = ma(sbr, 10)
-    rs2 = ma(sbr, 26)
-    rs = 100 * ((rs1 - rs2) / rs2 + 1)
-    rm1 = ma(rs, 1)
-    rm2 = ma(rs, 4)
-    rm = 100 * ((rm1 - rm2) / rm2 + 1)
-
-    return rs, rm
-
-@st.cache_data
-def ma(data, period):
-    return data.rolling(window=period).mean()
-
-@st.cache_data
-def get_data(universe, sector, timeframe, custom_tickers=None, custom_benchmark=None):
-    end_date = datetime.now()
-    if timeframe == "Weekly":
-        start_date = end_date - timedelta(weeks=100)
-    else:  # Daily
-        start_date = end_date - timedelta(days=500)
-
-    sector_universes = {
-        "US": {
-            "XLK": ["AAPL", "MSFT", "NVDA", "AVGO", "ADBE", "MU", "CRM", "ASML", "SNPS", "IBM", "INTC", "TXN", "NOW", "QCOM", "AMD", "AMAT", "NOW", "PANW", "CDNS", "TSMC"],
-            "XLY": ["AMZN", "TSLA", "HD", "MCD", "NKE", "LOW", "SBUX", "TJX", "BKNG", "MAR", "F", "GM", "ORLY", "DHI", "CMG", "TJX", "YUM", "LEN", "ULTA", "CCL", "EXPE"],
-            "XLV": ["UNH", "JNJ", "LLY", "PFE", "ABT", "TMO", "MRK", "ABBV", "DHR", "BMY", "AMGN", "CVS", "ISRG", "MDT", "GILD", "VRTX", "CI", "ZTS", "RGEN", "BSX", "HCA"],
-            "XLF": ["BRK.B", "JPM", "BAC", "WFC", "GS", "MS", "SPGI", "BLK", "C", "AXP", "CB", "MMC", "PGR", "PNC", "TFC", "V", "MA", "PYPL", "AON", "CME", "ICE", "COF"],
-            "XLC": ["META", "GOOGL", "GOOG", "NFLX", "CMCSA", "DIS", "VZ", "T", "TMUS", "ATVI", "EA", "TTWO", "MTCH", "CHTR", "DISH", "FOXA", "TTWO", "FOX", "NWS", "WBD"],
-            "XLI": ["UNP", "HON", "UPS", "BA", "CAT", "GE", "MMM", "RTX", "LMT", "FDX", "DE", "ETN", "EMR", "NSC", "CSX", "ADP", "GD", "NOC", "FDX", "JCI", "CARR", "ITW"],
-            "XLE": ["XOM", "CVX", "COP", "SLB", "EOG", "MPC", "PSX", "VLO", "OXY", "KMI", "WMB", "HES", "HAL", "DVN", "BKR", "CTRA", "EQT", "APA", "MRO", "TRGP", "FANG"],
-            "XLB": ["LIN", "APD", "SHW", "FCX", "ECL", "NEM", "DOW", "DD", "CTVA", "PPG", "NUE", "VMC", "ALB", "FMC", "CE", "MLM", "IFF", "STLD", "CF", "FMC"],
-            "XLP": ["PG", "KO", "PEP", "COST", "WMT", "PM", "MO", "EL", "CL", "GIS", "KMB", "SYY", "KHC", "STZ", "HSY", "TGT", "ADM", "MNST", "DG", "DLTR", "WBA", "SJM"],
-            "XLU": ["NEE", "DUK", "SO", "D", "AEP", "SRE", "EXC", "XEL", "PCG", "WEC", "ES", "ED", "DTE", "AEE", "ETR", "CEG", "PCG", "EIX", "FFE", "CMS", "CNP", "PPL"],
-            "XLRE": ["PLD", "AMT", "CCI", "EQIX", "PSA", "O", "WELL", "SPG", "SBAC", "AVB", "EQR", "DLR", "VTR", "ARE", "CBRE", "WY", "EXR", "MAA", "IRM", "ESS", "HST"]
-        },
-        "HK": {
-            "^HSNU": ["0002.HK", "0003.HK", "0006.HK", "0836.HK", "1038.HK", "2688.HK",],
-            "^HSNF": ["0005.HK", "0011.HK", "0388.HK", "0939.HK", "1398.HK", "2318.HK", "2388.HK", "2628.HK","3968.HK","3988.HK","1299.HK"],
-            "^HSNP": ["0012.HK", "0016.HK", "0017.HK", "0101.HK", "0823.HK", "0688.HK", "1109.HK", "1997.HK", "1209.HK", "0960.HK","1113.HK"],
-            "^HSNC": ["0700.HK", "0857.HK", "0883.HK", "0941.HK", "0001.HK","0175.HK","0241.HK","0267.HK","0285.HK","0027.HK",
-                      "0288.HK","0291.HK","0316.HK","0332.HK", "0386.HK", "0669.HK", "0762.HK", "0968.HK", "0981.HK", "0386.HK"]
-        }
-    }
-
-    if universe == "WORLD":
-        benchmark = "ACWI"
-        sectors = ["^GSPC", "^NDX", "^RUT", "^HSI", "3032.HK", "^STOXX50E", "^BSESN", "^KS11", 
-                   "^TWII", "000300.SS", "^N225", "HYG", "AGG", "EEM", "GDX", "XLE", "XME", "AAXJ","IBB","DBA"]
-        sector_names = {
-            "^GSPC": "標普500", "^NDX": "納指100", "^RUT": "羅素2000", "^HSI": "恆指",
-            "3032.HK": "恒生科技", "^STOXX50E": "歐洲", "^BSESN": "印度", "^KS11": "韓國",
-            "^TWII": "台灣", "000300.SS": "滬深300", "^N225": "日本", "HYG": "高收益債券",
-            "AGG": "投資級別債券", "EEM": "新興市場", "GDX": "金礦", "XLE": "能源",
-            "XME": "礦業", "AAXJ": "亞太日本除外", "IBB": "生物科技","DBA":"農業"
-        }
-    elif universe == "US":
-        benchmark = "^GSPC"
-        sectors = list(sector_universes["US"].keys())
-        sector_names = {
-            "XLK": "科技", "XLY": "非必須消費", "XLV": "健康護理",
-            "XLF": "金融", "XLC": "通訊", "XLI": "工業", "XLE": "能源",
-            "XLB": "物料", "XLP": "必須消費", "XLU": "公用", "XLRE": "房地產"
-        }
-    elif universe == "US Sectors":
-        if sector:
-            benchmark = sector
-            sectors = sector_universes["US"][sector]
-            sector_names = {s: "" for s in sectors}
-        else:
-            st.error("Please select a US sector.")
-            return None, None, None, None
-    elif universe == "HK":
-        benchmark = "^HSI"
-        sectors = list(sector_universes["HK"].keys())
-        sector_names = {"^HSNU": "公用", "^HSNF": "金融", "^HSNP": "地產", "^HSNC": "工商"}
-    elif universe == "HK Sub-indexes":
-        if sector:
-            benchmark = sector
-            sectors = sector_universes["HK"][sector]
-            sector_names = {s: "" for s in sectors}
-        else:
-            st.error("Please select a HK sub-index.")
-            return None, None, None, None
-    elif universe in ["Existing Portfolio", "Monitoring Portfolio", "Screener List", "US Portfolio"]:
-        if custom_benchmark and custom_tickers:
-            benchmark = custom_benchmark
-            sectors = [ticker for ticker in custom_tickers if ticker]
-            sector_names = {s: "" for s in sectors}
-        else:
-            st.error(f"Please provide at least one stock ticker and select a benchmark for your {universe}.")
-            return None, None, None, None
-            
-    elif universe == "FX":
-        benchmark = "HKDUSD=X"
-        sectors = ["GBPUSD=X", "EURUSD=X", "AUDUSD=X", "NZDUSD=X", "CADUSD=X", "CHFUSD=X", "JPYUSD=X", "CNYUSD=X",  "EURGBP=X", "AUDNZD=X", "AUDCAD=X", "NZDCAD=X", "DX-Y.NYB"]
-        sector_names = {
-            "GBPUSD=X": "GBP", "EURUSD=X": "EUR", "AUDUSD=X": "AUD", "NZDUSD=X": "NZD",
-            "CADUSD=X": "CAD",  "JPYUSD=X": "JPY", "EURGBP=X": "EURGBP", "AUDNZD=X": "AUDNZD",
-            "AUDCAD=X": "AUDCAD", "NZDCAD=X": "NZDCAD", "DX-Y.NYB":"DXY", "CHFUSD=X":"CHF","CNYUSD=X":"CNY" 
-        }
-    else:
-        st.error("Invalid universe selection.")
-        return None, None, None, None
-
+# The in-process stack (downloader, price store, warmer, event log) is imported by
+# the resources that build it, so a thin client never loads it
+
+@st.cache_resource
+def get_downloader():
+    from downloader import Downloader
+    return Downloader()
+
+@st.cache_resource
+def get_price_store():
+    from price_store import PriceStore
+    return PriceStore(download=get_downloader())
+
+@st.cache_resource
+def get_ticker_cache():
+    from ticker_cache import TickerCache
+    return TickerCache(get_price_store())
+
+@st.cache_resource
+def get_universe_cache():
+    from universe_cache import UniverseCache
+    return UniverseCache()
+
+@st.cache_resource
+def get_event_log():
+    from rrg_scanner import EventLog
+    return EventLog()
+
+@st.cache_resource
+def get_warmer():
+    from prefetch import UniverseWarmer
+    def load_portfolio(portfolio_type):
+        return get_portfolio_loader().load(portfolio_type)[0]
+    warmer = UniverseWarmer(get_ticker_cache(), load_portfolio, on_warm=get_universe_cache().clear,
+                            event_log=get_event_log())
+    if os.environ.get("RRG_PREFETCH", "1") != "0":
+        warmer.start()
+    return warmer
+
+@st.cache_resource
+def get_rrg_cache():
+    from rrg_cache import RRGResultCache
+    return RRGResultCache()
+
+@st.cache_resource
+def get_rrg_service():
+    # A thin client when RRG_SERVICE_URL points at a running rrg_service.py (no local
+    # downloader, store or warmer is built then), otherwise the same service in this
+    # process, shared by every session
+    from rrg_service import SERVICE_URL, RRGService, ServiceClient
+    if SERVICE_URL:
+        # Enough RRG rows for the longest tail (52) on top of the replay frames
+        return ServiceClient(SERVICE_URL, history=REPLAY_MAX_FRAMES + 52)
+    return RRGService(get_ticker_cache(), get_downloader(), get_rrg_cache(), get_universe_cache(), get_warmer(),
+                      event_log=get_event_log())
+
+def from_service(what, method, *args, level="warning"):
+    # Calls a service method; when the thin client cannot get an answer from
+    # rrg_service.py the page shows why instead of crashing, and gets None
+    from rrg_service import ServiceError
     try:
-        tickers_to_download = [benchmark] + sectors
-        st.info(f"Attempting to download data for: {', '.join(tickers_to_download)}")
-        
-        data = yf.download(tickers_to_download, start=start_date, end=end_date)['Close']
-        
-        # Check the actual date range of the downloaded data
-        actual_start_date = data.index.min()
-        actual_end_date = data.index.max()
-        
-        st.info(f"Data available from {actual_start_date.date()} to {actual_end_date.date()}")
-        
-        if actual_end_date.date() < end_date.date() - timedelta(days=1):
-            st.warning(f"The most recent data available is from {actual_end_date.date()}. "
-                       f"This may be due to market holidays or delays in data updates.")
-        
-        missing_tickers = set(tickers_to_download) - set(data.columns)
-        if missing_tickers:
-            st.warning(f"The following tickers could not be downloaded: {', '.join(missing_tickers)}")
-            
-            if universe == "WORLD":
-                if "^TWII" in missing_tickers:
-                    st.info("Attempting to download alternative for ^TWII: TAIEX")
-                    twii_data = yf.download("TAIEX", start=start_date, end=end_date)['Close']
-                    if not twii_data.empty:
-                        data["^TWII"] = twii_data
-                        missing_tickers.remove("^TWII")
-                        st.success("Successfully downloaded TAIEX as a proxy for ^TWII")
-                
-                if "3032.HK" in missing_tickers:
-                    st.info("Attempting to download alternative for 3032.HK: ^HSTECH")
-                    hstech_data = yf.download("^HSTECH", start=start_date, end=end_date)['Close']
-                    if not hstech_data.empty:
-                        data["3032.HK"] = hstech_data
-                        missing_tickers.remove("3032.HK")
-                        st.success("Successfully downloaded ^HSTECH as a proxy for 3032.HK")
-            
-            for missing_ticker in missing_tickers:
-                data[missing_ticker] = pd.Series(index=data.index, dtype='float64')
-
-        if data.empty:
-            st.error(f"No data available for the selected universe and sector.")
-            return None, benchmark, sectors, sector_names
-        
-        data = data.dropna(axis=1, how='all')
-        
-        if benchmark not in data.columns:
-            st.error(f"No data available for the benchmark {benchmark}. Please choose a different benchmark.")
-            return None, benchmark, sectors, sector_names
-        
-        valid_sectors = [s for s in sectors if s in data.columns]
-        if len(valid_sectors) == 0:
-            st.error("No valid sector data available. Please check your input and try again.")
-            return None, benchmark, sectors, sector_names
-        
-        sectors = valid_sectors
-        sector_names = {s: sector_names[s] for s in valid_sectors if s in sector_names}
-        
-    except Exception as e:
-        st.error(f"Error fetching data: {str(e)}")
-        return None, benchmark, sectors, sector_names
+        return method(*args)
+    except ServiceError as e:
+        getattr(st, level)(f"Could not load {what}: {e}")
+        return None
 
-    st.success(f"Successfully downloaded data for {len(data.columns)} tickers.")
-    return data, benchmark, sectors, sector_names
+# Closes shown under "Latest Data"
+LATEST_PRICE_ROWS = 5
+
+def get_data(universe, sector, timeframe, custom_tickers=None, custom_benchmark=None, windows=DEFAULT_WINDOWS,
+             price_rows=None):
+    # Loaded (or merged with an identical in-flight request) by the shared RRG service;
+    # returns the calendar-aligned closes (the last `price_rows` of them, all when None),
+    # their RRG frame and the freshness report, showing the service's messages
+    result = from_service("the RRG data", get_rrg_service().rrg, universe, sector, timeframe, custom_tickers,
+                          custom_benchmark, windows, price_rows, level="error")
+    if result is None:
+        return None, None, [], {}, None, None
+    for level, message in result["messages"]:
+        getattr(st, level)(message)
+    return (result["prices"], result["benchmark"], result["sectors"], result["sector_names"], result["rrg"],
+            result["freshness"])
+
+def get_benchmark_quadrants(tickers, timeframe, windows=DEFAULT_WINDOWS):
+    # Latest quadrant of every ticker against every portfolio benchmark, from one
+    # price matrix. Also leaves all benchmarks in the ticker cache, so switching
+    # the benchmark selector does not download anything.
+    return from_service("the quadrants by benchmark", get_rrg_service().quadrants, tickers, timeframe, windows)
+
+# Above this many tickers the chart switches to a few WebGL traces with downsampled tails
+FAST_RENDER_THRESHOLD = 40
+FAST_RENDER_TAIL_POINTS = 12
+
+def downsample_tail(x_values, y_values, max_points):
+    # Keep every k-th point counting back from the latest, so the latest point always stays
+    if len(x_values) <= max_points:
+        return x_values, y_values
+    step = -(-len(x_values) // max_points)
+    return x_values.iloc[::-1][::step][::-1], y_values.iloc[::-1][::step][::-1]
+
+def chart_labels(sector, sector_names, universe):
+    # (legend label, label drawn next to the latest point)
+    if universe == "FX":
+        return f"{sector} ({sector_names.get(sector, '')})", sector_names.get(sector, sector)
+    elif universe in ["US Sectors", "HK Sub-indexes", "Existing Portfolio", "Monitoring Portfolio","Screener List", "US Portfolio"]:
+        return sector, sector.replace('.HK', '')
+    else:
+        return f"{sector} ({sector_names.get(sector, '')})", f"{sector_names.get(sector, sector)}"
+
+def chart_ranges(x_values, y_values, padding=0.1, clamp=DEFAULT_CLAMP):
+    if not (np.isfinite(x_values).any() and np.isfinite(y_values).any()):
+        # Nothing to fit the axes to yet
+        return clamp[0], clamp[1], clamp[0], clamp[1]
+    min_x, max_x = np.nanmin(x_values), np.nanmax(x_values)
+    min_y, max_y = np.nanmin(y_values), np.nanmax(y_values)
+    range_x = max_x - min_x
+    range_y = max_y - min_y
+    low, high = clamp
+    min_x = max(min_x - range_x * padding, low)
+    max_x = min(max_x + range_x * padding, high)
+    min_y = max(min_y - range_y * padding, low)
+    max_y = min(max_y + range_y * padding, high)
+    return min_x, max_x, min_y, max_y
+
+def apply_rrg_layout(fig, universe, timeframe, benchmark, min_x, max_x, min_y, max_y):
+    fig.update_layout(
+        title=f"Relative Rotation Graph (RRG) for {universe} ({timeframe})",
+        xaxis_title="RS-Ratio",
+        yaxis_title="RS-Momentum",
+        width=1200,
+        height=800,
+        xaxis=dict(range=[min_x, max_x], title_font=dict(size=14)),
+        yaxis=dict(range=[min_y, max_y], title_font=dict(size=14)),
+        plot_bgcolor='white',
+        legend=dict(yanchor="top", y=0.99, xanchor="left", x=1.02, title=f"Legend<br>Benchmark: {benchmark}"),
+        shapes=[
+            dict(type="rect", xref="x", yref="y", x0=min_x, y0=100, x1=100, y1=max_y, fillcolor="lightblue", opacity=0.35, line_width=0),
+            dict(type="rect", xref="x", yref="y", x0=100, y0=100, x1=max_x, y1=max_y, fillcolor="lightgreen", opacity=0.35, line_width=0),
+            dict(type="rect", xref="x", yref="y", x0=min_x, y0=min_y, x1=100, y1=100, fillcolor="pink", opacity=0.35, line_width=0),
+            dict(type="rect", xref="x", yref="y", x0=100, y0=min_y, x1=max_x, y1=100, fillcolor="lightyellow", opacity=0.35, line_width=0),
+            dict(type="line", xref="x", yref="y", x0=100, y0=min_y, x1=100, y1=max_y, line=dict(color="black", width=1)),
+            dict(type="line", xref="x", yref="y", x0=min_x, y0=100, x1=max_x, y1=100, line=dict(color="black", width=1)),
+        ]
+    )
 
-def create_rrg_chart(data, benchmark, sectors, sector_names, universe, timeframe, tail_length):
-    if timeframe == "Weekly":
-        data_resampled = data.resample('W-FRI').last()
-    else:  # Daily
-        data_resampled = data
+    label_font = dict(size=32, color='black', family='Arial Black')
+    fig.add_annotation(x=min_x, y=min_y, text="落後", showarrow=False, font=label_font, xanchor="left", yanchor="bottom")
+    fig.add_annotation(x=max_x, y=min_y, text="轉弱", showarrow=False, font=label_font, xanchor="right", yanchor="bottom")
+    fig.add_annotation(x=min_x, y=max_y, text="改善", showarrow=False, font=label_font, xanchor="left", yanchor="top")
+    fig.add_annotation(x=max_x, y=max_y, text="領先", showarrow=False, font=label_font, xanchor="right", yanchor="top")
 
-    rrg_data = pd.DataFrame()
-    for sector in sectors:
-        rs_ratio, rs_momentum = calculate_rrg_values(data_resampled[sector], data_resampled[benchmark])
-        rrg_data[f"{sector}_RS-Ratio"] = rs_ratio
-        rrg_data[f"{sector}_RS-Momentum"] = rs_momentum
+def create_rrg_chart(data, benchmark, sectors, sector_names, universe, timeframe, tail_length, rrg_data=None, fast_render=None,
+                     windows=DEFAULT_WINDOWS, clamp=DEFAULT_CLAMP):
+    if rrg_data is None:
+        rrg_data = get_rrg_cache().compute_frame(resample_prices(data, timeframe), benchmark, sectors, timeframe, windows)
+    if not np.isfinite(rrg_data.xs("RS-Momentum", axis=1, level=1).to_numpy()).any():
+        # History shorter than the RRG windows: nothing to draw
+        return None
+    # Rows where no series has a point (only the benchmark traded, or every ticker is
+    # stale) would shorten the tail; the old per-ticker dropna never kept them.
+    rrg_data = rrg_data.dropna(how="all")
 
     plot_data = rrg_data.iloc[-tail_length:]
     
     boundary_length = max(6, tail_length)
     boundary_data = rrg_data.iloc[-boundary_length:]
     
-    padding = 0.1
-    min_x = boundary_data[[f"{sector}_RS-Ratio" for sector in sectors]].min().min()
-    max_x = boundary_data[[f"{sector}_RS-Ratio" for sector in sectors]].max().max()
-    min_y = boundary_data[[f"{sector}_RS-Momentum" for sector in sectors]].min().min()
-    max_y = boundary_data[[f"{sector}_RS-Momentum" for sector in sectors]].max().max()
-
-    range_x = max_x - min_x
-    range_y = max_y - min_y
-    min_x = max(min_x - range_x * padding, 80)
-    max_x = min(max_x + range_x * padding, 120)
-    min_y = max(min_y - range_y * padding, 80)
-    max_y = min(max_y + range_y * padding, 120)
+    min_x, max_x, min_y, max_y = chart_ranges(
+        boundary_data.xs("RS-Ratio", axis=1, level=1).to_numpy(),
+        boundary_data.xs("RS-Momentum", axis=1, level=1).to_numpy(),
+        clamp=clamp
+    )
 
     fig = go.Figure()
 
     quadrant_colors = {"Lagging": "pink", "Weakening": "lightyellow", "Improving": "lightblue", "Leading": "lightgreen"}
     curve_colors = {"Lagging": "red", "Weakening": "orange", "Improving": "darkblue", "Leading": "darkgreen"}
 
-    def get_quadrant(x, y):
-        if x < 100 and y < 100: return "Lagging"
-        elif x >= 100 and y < 100: return "Weakening"
-        elif x < 100 and y >= 100: return "Improving"
-        else: return "Leading"
+    if fast_render is None:
+        fast_render = len(sectors) > FAST_RENDER_THRESHOLD
+    # Fast mode: tails grouped into one NaN-separated trace per quadrant colour, latest points in one trace
+    fast_tails = {quadrant: ([], [], []) for quadrant in curve_colors}
+    fast_latest = ([], [], [], [], [], [])
 
     for sector in sectors:
-        x_values = plot_data[f"{sector}_RS-Ratio"].dropna()
-        y_values = plot_data[f"{sector}_RS-Momentum"].dropna()
+        x_values = plot_data[(sector, "RS-Ratio")].dropna()
+        y_values = plot_data[(sector, "RS-Momentum")].dropna()
         
         if len(x_values) > 0 and len(y_values) > 0:
             current_quadrant = get_quadrant(x_values.iloc[-1], y_values.iloc[-1])
             color = curve_colors[current_quadrant]
             
-            if universe == "FX":
-                legend_label = f"{sector} ({sector_names.get(sector, '')})"
-                chart_label = sector_names.get(sector, sector)
-            elif universe in ["US Sectors", "HK Sub-indexes", "Existing Portfolio", "Monitoring Portfolio","Screener List", "US Portfolio"]:
-                legend_label = sector
-                chart_label = sector.replace('.HK', '')
-            else:
-                legend_label = f"{sector} ({sector_names.get(sector, '')})"
-                chart_label = f"{sector_names.get(sector, sector)}"
-            
-            fig.add_trace(go.Scatter(
-                x=x_values, y=y_values, mode='lines+markers', name=legend_label,
-                line=dict(color=color, width=2), marker=dict(size=6, symbol='circle'),
-                legendgroup=sector, showlegend=True
-            ))
-            
+            legend_label, chart_label = chart_labels(sector, sector_names, universe)
+
             if len(y_values) > 1:
                 current_momentum = y_values.iloc[-1]
                 last_momentum = y_values.iloc[-2]
                 text_position = "top center" if current_momentum > last_momentum else "bottom center"
             else:
                 text_position = "top center"
-            
+
+            if fast_render:
+                tail_x, tail_y = downsample_tail(x_values, y_values, FAST_RENDER_TAIL_POINTS)
+                xs, ys, hover = fast_tails[current_quadrant]
+                xs.extend(tail_x.tolist() + [None])
+                ys.extend(tail_y.tolist() + [None])
+                hover.extend([legend_label] * len(tail_x) + [None])
+                for values, value in zip(fast_latest, (x_values.iloc[-1], y_values.iloc[-1], color, chart_label, text_position, legend_label)):
+                    values.append(value)
+                continue
+
+            fig.add_trace(go.Scatter(
+                x=x_values, y=y_values, mode='lines+markers', name=legend_label,
+                line=dict(color=color, width=2), marker=dict(size=6, symbol='circle'),
+                legendgroup=sector, showlegend=True
+            ))
+
             fig.add_trace(go.Scatter(
                 x=[x_values.iloc[-1]], y=[y_values.iloc[-1]], mode='markers+text',
                 name=f"{sector} (latest)", marker=dict(color=color, size=12, symbol='circle'),
@@ -320,34 +274,96 @@ def create_rrg_chart(data, benchmark, sectors, sector_names, universe, timeframe
                 textfont=dict(color='black', size=12, family='Arial Black')
             ))
 
-    fig.update_layout(
-        title=f"Relative Rotation Graph (RRG) for {universe} ({timeframe})",
-        xaxis_title="RS-Ratio",
-        yaxis_title="RS-Momentum",
-        width=1200,
-        height=800,
-        xaxis=dict(range=[min_x, max_x], title_font=dict(size=14)),
-        yaxis=dict(range=[min_y, max_y], title_font=dict(size=14)),
-        plot_bgcolor='white',
-        legend=dict(yanchor="top", y=0.99, xanchor="left", x=1.02, title=f"Legend<br>Benchmark: {benchmark}"),
-        shapes=[
-            dict(type="rect", xref="x", yref="y", x0=min_x, y0=100, x1=100, y1=max_y, fillcolor="lightblue", opacity=0.35, line_width=0),
-            dict(type="rect", xref="x", yref="y", x0=100, y0=100, x1=max_x, y1=max_y, fillcolor="lightgreen", opacity=0.35, line_width=0),
-            dict(type="rect", xref="x", yref="y", x0=min_x, y0=min_y, x1=100, y1=100, fillcolor="pink", opacity=0.35, line_width=0),
-            dict(type="rect", xref="x", yref="y", x0=100, y0=min_y, x1=max_x, y1=100, fillcolor="lightyellow", opacity=0.35, line_width=0),
-            dict(type="line", xref="x", yref="y", x0=100, y0=min_y, x1=100, y1=max_y, line=dict(color="black", width=1)),
-            dict(type="line", xref="x", yref="y", x0=min_x, y0=100, x1=max_x, y1=100, line=dict(color="black", width=1)),
-        ]
-    )
+    if fast_render:
+        for quadrant, (xs, ys, hover) in fast_tails.items():
+            if xs:
+                fig.add_trace(go.Scattergl(
+                    x=xs, y=ys, mode='lines+markers', name=quadrant, hovertext=hover, hoverinfo='text+x+y',
+                    line=dict(color=curve_colors[quadrant], width=1.5), marker=dict(size=4, symbol='circle'),
+                    connectgaps=False, showlegend=True
+                ))
+        latest_x, latest_y, colors, labels, positions, hover = fast_latest
+        fig.add_trace(go.Scattergl(
+            x=latest_x, y=latest_y, mode='markers+text', name="Latest", hovertext=hover, hoverinfo='text+x+y',
+            marker=dict(color=colors, size=10, symbol='circle'), text=labels, textposition=positions,
+            textfont=dict(color='black', size=10, family='Arial Black'), showlegend=False
+        ))
+
+    apply_rrg_layout(fig, universe, timeframe, benchmark, min_x, max_x, min_y, max_y)
 
-    label_font = dict(size=32, color='black', family='Arial Black')
-    fig.add_annotation(x=min_x, y=min_y, text="落後", showarrow=False, font=label_font, xanchor="left", yanchor="bottom")
-    fig.add_annotation(x=max_x, y=min_y, text="轉弱", showarrow=False, font=label_font, xanchor="right", yanchor="bottom")
-    fig.add_annotation(x=min_x, y=max_y, text="改善", showarrow=False, font=label_font, xanchor="left", yanchor="top")
-    fig.add_annotation(x=max_x, y=max_y, text="領先", showarrow=False, font=label_font, xanchor="right", yanchor="top")
+    return fig
 
-    
+REPLAY_MAX_FRAMES = 104
+
+def replay_traces(replay, end, tail_length, legend_labels, point_labels, curve_colors):
+    # Traces for one replay frame: one NaN-separated tail trace per quadrant colour
+    # (always all four, so every frame has the same traces) and one latest-point trace.
+    window = replay[max(0, end - tail_length + 1):end + 1]
+    latest = replay[end]
+    codes = quadrant_codes(latest[:, 0], latest[:, 1])
+    traces = []
+    for code, quadrant in enumerate(QUADRANTS):
+        selected = codes == code
+        tails = window[:, selected, :]
+        tails = np.concatenate([tails, np.full((1, tails.shape[1], 2), np.nan, dtype=np.float32)])
+        points = tails.transpose(1, 0, 2).reshape(-1, 2)
+        traces.append(go.Scatter(
+            x=points[:, 0], y=points[:, 1], mode='lines+markers', name=quadrant,
+            hovertext=np.repeat(legend_labels[selected], len(tails)), hoverinfo='text+x+y',
+            line=dict(color=curve_colors[quadrant], width=1.5), marker=dict(size=5, symbol='circle')
+        ))
+    shown = codes >= 0
+    previous = replay[end - 1, :, 1] if end > 0 else latest[:, 1]
+    positions = np.where(latest[:, 1] > previous, "top center", "bottom center")
+    traces.append(go.Scatter(
+        x=latest[shown, 0], y=latest[shown, 1], mode='markers+text', name="Latest",
+        marker=dict(color=[curve_colors[QUADRANTS[code]] for code in codes[shown]], size=10, symbol='circle'),
+        text=point_labels[shown], textposition=positions[shown], hovertext=legend_labels[shown], hoverinfo='text+x+y',
+        textfont=dict(color='black', size=10, family='Arial Black'), showlegend=False
+    ))
+    return traces
+
+def create_rrg_replay_chart(rrg_data, benchmark, sectors, sector_names, universe, timeframe, tail_length, clamp=DEFAULT_CLAMP):
+    # Every frame is precomputed from one float32 (dates, tickers, 2) array; scrubbing
+    # and playback run in the browser without re-running the script.
+    replay = rrg_replay_array(rrg_data, sectors)
+    dates = rrg_data.index
+    has_point = np.isfinite(replay).all(axis=2).any(axis=1)
+    frame_ends = np.flatnonzero(has_point)[-REPLAY_MAX_FRAMES:]
+    if frame_ends.size == 0:
+        # History shorter than the RRG windows: nothing to replay
+        return None
+    curve_colors = {"Lagging": "red", "Weakening": "orange", "Improving": "darkblue", "Leading": "darkgreen"}
+    labels = [chart_labels(sector, sector_names, universe) for sector in sectors]
+    legend_labels = np.array([label[0] for label in labels], dtype=object)
+    point_labels = np.array([label[1] for label in labels], dtype=object)
+
+    visible = replay[max(0, frame_ends[0] - tail_length + 1):]
+    min_x, max_x, min_y, max_y = chart_ranges(visible[:, :, 0], visible[:, :, 1], clamp=clamp)
+
+    frames = []
+    for end in frame_ends:
+        name = dates[end].strftime('%Y-%m-%d')
+        frames.append(go.Frame(data=replay_traces(replay, end, tail_length, legend_labels, point_labels, curve_colors), name=name))
 
+    fig = go.Figure(data=frames[-1].data, frames=frames)
+    apply_rrg_layout(fig, universe, timeframe, benchmark, min_x, max_x, min_y, max_y)
+    play_args = dict(frame=dict(duration=300, redraw=True), transition=dict(duration=0), fromcurrent=True, mode="immediate")
+    fig.update_layout(
+        updatemenus=[dict(
+            type="buttons", direction="left", x=0, y=-0.08, xanchor="left", yanchor="top",
+            buttons=[
+                dict(label="Play", method="animate", args=[None, play_args]),
+                dict(label="Pause", method="animate", args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ]
+        )],
+        sliders=[dict(
+            active=len(frames) - 1, x=0.1, len=0.9, y=-0.08, currentvalue=dict(prefix="Date: "),
+            steps=[dict(label=frame.name, method="animate",
+                        args=[[frame.name], dict(frame=dict(duration=0, redraw=True), mode="immediate")])
+                   for frame in frames]
+        )]
+    )
     return fig
 
 # Main Streamlit app
@@ -382,26 +398,47 @@ tail_length = st.sidebar.slider(
     help="Number of data points to show in the chart"
 )
 
+render_mode = st.sidebar.selectbox(
+    "Render Mode",
+    options=["Auto", "Standard", "Fast"],
+    help=f"Fast draws all tails as a few WebGL traces; Auto switches to it above {FAST_RENDER_THRESHOLD} tickers"
+)
+fast_render = {"Auto": None, "Standard": False, "Fast": True}[render_mode]
+
+replay_mode = st.sidebar.checkbox(
+    "Replay Mode",
+    help="Animate the rotation over history, using the tail length for each frame"
+)
+
+with st.sidebar.expander("RRG Parameters"):
+    # Moving-average windows (in bars of the selected timeframe) and the chart axis
+    # limits; `python rrg_sweep.py` compares window settings for a universe. No window
+    # may be longer than the bars the timeframe loads (about 100 weeks / 350 days).
+    max_bars = lookback_bars(timeframe, datetime.now())
+    window_keys = ["rs_short_window", "rs_long_window", "rm_short_window", "rm_long_window"]
+    window_limits = dict(zip(window_keys, (min(100, max_bars), min(200, max_bars), min(50, max_bars), min(50, max_bars))))
+    for key, default in zip(window_keys, DEFAULT_WINDOWS):
+        st.session_state[key] = min(st.session_state.get(key, default), window_limits[key])
+    window_columns = st.columns(2)
+    rs_short = window_columns[0].number_input("RS-Ratio short", min_value=1, max_value=window_limits["rs_short_window"],
+                                              key="rs_short_window")
+    rs_long = window_columns[1].number_input("RS-Ratio long", min_value=1, max_value=window_limits["rs_long_window"],
+                                             key="rs_long_window")
+    rm_short = window_columns[0].number_input("RS-Momentum short", min_value=1, max_value=window_limits["rm_short_window"],
+                                              key="rm_short_window")
+    rm_long = window_columns[1].number_input("RS-Momentum long", min_value=1, max_value=window_limits["rm_long_window"],
+                                             key="rm_long_window")
+    rrg_windows = (int(rs_short), int(rs_long), int(rm_short), int(rm_long))
+    chart_clamp = st.slider("Axis Limits", min_value=50, max_value=150, value=DEFAULT_CLAMP, step=1, key="chart_clamp")
+
 st.sidebar.header("Universe Selection")
 
-universe_options = ["WORLD", "US", "US Sectors", "HK", "HK Sub-indexes", "Existing Portfolio", "Monitoring Portfolio", "Screener List", "US Portfolio", "FX"]
-universe_names = {
-    "WORLD": "World", 
-    "US": "US", 
-    "US Sectors": "US Sectors", 
-    "HK": "Hong Kong", 
-    "HK Sub-indexes": "HK Sub-indexes", 
-    "Existing Portfolio": "Existing Portfolio",
-    "Monitoring Portfolio": "Monitoring Portfolio",
-    "Screener List": "Screener List",
-    "US Portfolio": "US Portfolio",
-    "FX": "Foreign Exchange"
-}
+universe_options = list(REGISTRY.universes)
 
 selected_universe = st.sidebar.selectbox(
     "Select Universe",
     options=universe_options,
-    format_func=lambda x: universe_names[x],
+    format_func=REGISTRY.label,
     key="universe_selector",
     index=universe_options.index(st.session_state.selected_universe)
 )
@@ -414,12 +451,8 @@ custom_tickers = None
 custom_benchmark = None
 
 if selected_universe == "US Sectors":
-    us_sectors = ["XLK", "XLY", "XLV", "XLF", "XLC", "XLI", "XLE", "XLB", "XLP", "XLU", "XLRE"]
-    us_sector_names = {
-        "XLK": "Technology", "XLY": "Consumer Discretionary", "XLV": "Health Care",
-        "XLF": "Financials", "XLC": "Communications", "XLI": "Industrials", "XLE": "Energy",
-        "XLB": "Materials", "XLP": "Consumer Staples", "XLU": "Utilities", "XLRE": "Real Estate"
-    }
+    us_sector_names = REGISTRY.sectors("US Sectors")
+    us_sectors = list(us_sector_names)
     st.sidebar.subheader("US Sectors")
     selected_us_sector = st.sidebar.selectbox(
         "Select US Sector",
@@ -430,8 +463,8 @@ if selected_universe == "US Sectors":
     if selected_us_sector:
         sector = selected_us_sector
 elif selected_universe == "HK Sub-indexes":
-    hk_sectors = ["^HSNU", "^HSNF", "^HSNP", "^HSNC"]
-    hk_sector_names = {"^HSNU": "Utilities", "^HSNF": "Financials", "^HSNP": "Properties", "^HSNC": "Commerce & Industry"}
+    hk_sector_names = REGISTRY.sectors("HK Sub-indexes")
+    hk_sectors = list(hk_sector_names)
     st.sidebar.subheader("Hang Seng Sub-indexes")
     selected_hk_sector = st.sidebar.selectbox(
         "Select HK Sub-index",
@@ -478,21 +511,13 @@ elif selected_universe in ["Existing Portfolio", "Monitoring Portfolio", "Screen
             )
         
         if ticker:
-            if ticker.isalpha():
-                processed_ticker = ticker.upper()
-            else:
-                numeric_part = ''.join(filter(str.isdigit, ticker))
-                if numeric_part:
-                    processed_ticker = f"{int(numeric_part):04d}.HK"
-                else:
-                    processed_ticker = ticker
-            custom_tickers.append(processed_ticker)
+            custom_tickers.append(normalize_ticker(ticker))
     
     st.session_state[f'{portfolio_key}_tickers'] = custom_tickers
 
     custom_benchmark = st.sidebar.selectbox(
         "Select Benchmark",
-        options=["ACWI", "^GSPC", "^HSI"],
+        options=PORTFOLIO_BENCHMARKS,
         key=f"{portfolio_key}_benchmark_selector"
     )
 
@@ -506,14 +531,59 @@ elif selected_universe in ["Existing Portfolio", "Monitoring Portfolio", "Screen
         st.session_state.reset_tickers = False
 
 
+with st.sidebar.expander("Prefetch Status"):
+    warm_status = from_service("the prefetch status", get_rrg_service().warm_status)
+    if warm_status is not None:
+        if warm_status["next_run"]:
+            st.write(f"Next warm-up: {warm_status['next_run'].astimezone().strftime('%Y-%m-%d %H:%M')}")
+        st.dataframe(pd.DataFrame(warm_status["rows"]))
+
+show_diagnostics = st.sidebar.checkbox("Show Diagnostics", value=False, key="show_diagnostics")
+
+with st.sidebar.expander("Rotation Alerts"):
+    alerts_only = st.checkbox("Improving→Leading / Leading→Weakening only", value=True, key="alerts_only")
+    events = from_service("the rotation alerts", get_rrg_service().events, 50, alerts_only)
+    if events is not None:
+        if events.empty:
+            st.write("No quadrant transitions logged yet.")
+        else:
+            st.dataframe(events[["date", "universe", "timeframe", "ticker", "from_quadrant", "to_quadrant", "heading",
+                                 "velocity"]].round({"heading": 0, "velocity": 2}), hide_index=True)
+
 # Main content area
 if selected_universe:
-    data, benchmark, sectors, sector_names = get_data(selected_universe, sector, timeframe, custom_tickers, custom_benchmark)
+    with METRICS.timer("get_data") as record:
+        # Only the rows "Latest Data" shows, unless the raw data is asked for
+        price_rows = None if st.session_state.get("show_raw_data") else LATEST_PRICE_ROWS
+        data, benchmark, sectors, sector_names, rrg_data, freshness = get_data(
+            selected_universe, sector, timeframe, custom_tickers, custom_benchmark, rrg_windows, price_rows)
+        record.rows = 0 if data is None else len(data)
     if data is not None and not data.empty:
-        fig = create_rrg_chart(data, benchmark, sectors, sector_names, selected_universe, timeframe, tail_length)
-        st.plotly_chart(fig, use_container_width=True)
+        with METRICS.timer("create_rrg_chart") as record:
+            if replay_mode:
+                fig = create_rrg_replay_chart(rrg_data, benchmark, sectors, sector_names, selected_universe, timeframe, tail_length,
+                                              chart_clamp)
+            else:
+                fig = create_rrg_chart(data, benchmark, sectors, sector_names, selected_universe, timeframe, tail_length, rrg_data, fast_render,
+                                       rrg_windows, chart_clamp)
+            record.rows = 0 if fig is None else len(fig.data)
+        if fig is None:
+            st.warning(f"No RRG points yet: RS-Momentum needs {rrg_windows[1] + rrg_windows[3] - 1} {timeframe.lower()} "
+                       f"bars with these windows, more than this universe's history has. Shorten the RS-Ratio long or "
+                       f"RS-Momentum long window, or switch timeframe.")
+        else:
+            with METRICS.timer("plotly_chart") as record:
+                st.plotly_chart(fig, use_container_width=True)
+                record.rows = len(fig.data)
+        if selected_universe in PORTFOLIO_UNIVERSES:
+            with st.expander("Quadrants by Benchmark"):
+                quadrants = get_benchmark_quadrants(sectors, timeframe, rrg_windows)
+                if quadrants is not None:
+                    st.dataframe(quadrants)
         st.subheader("Latest Data")
-        st.dataframe(data.tail())
+        st.dataframe(data.tail(LATEST_PRICE_ROWS))
+        with st.expander("Data Freshness"):
+            st.dataframe(freshness, hide_index=True)
         
         if st.session_state.data_refreshed:
             st.success("Data refreshed successfully!")
@@ -523,10 +593,28 @@ if selected_universe:
 else:
     st.write("Please select a universe from the sidebar.")
 
-if st.checkbox("Show raw data"):
+if st.checkbox("Show raw data", key="show_raw_data"):
     st.write("Raw data:")
     st.write(data)
     st.write("Sectors:")
     st.write(sectors)
     st.write("Benchmark:")
     st.write(benchmark)
+
+# Rendered last so the panel includes this run's timings
+cache_stats = from_service("the service statistics", get_rrg_service().stats) or {}
+METRICS.write_prometheus(caches=cache_stats)
+if show_diagnostics:
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        stage_rows = pd.DataFrame(METRICS.stage_rows())
+        if not stage_rows.empty:
+            stage_rows["avg_seconds"] = stage_rows["seconds"] / stage_rows["calls"]
+            st.dataframe(stage_rows[["stage", "calls", "last_seconds", "avg_seconds", "max_seconds", "rows", "bytes"]]
+                         .round(4), hide_index=True)
+        counters = dict(METRICS.counters)
+        cache_stats["warmed_results"] = {"hits": counters.get("warm_result_hit", 0), "misses": counters.get("warm_result_miss", 0)}
+        st.dataframe(pd.DataFrame(cache_stats).T)
+        st.download_button("Metrics (JSON lines)", METRICS.jsonl_snapshot(cache_stats), "rrg_metrics.jsonl", "application/json")
+        st.download_button("Metrics (Prometheus)", METRICS.prometheus_text(cache_stats), "rrg_metrics.prom", "text/plain")
+        if st.button("Reset Metrics"):
+            METRICS.reset()
@@ -0,0 +1,141 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from price_store import InFlight
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RRG_TICKER_CACHE_MB", "256")) * 1024 * 1024)
+DEFAULT_MIN_HISTORY = timedelta(weeks=100)
+
+
+class TickerCache:
+    # Per-symbol daily closes shared by every universe, timeframe and benchmark.
+    # Misses are filled from `source` (anything with get_closes(tickers, start, end),
+    # normally the PriceStore) in one call, always for at least `min_history`, so the
+    # Weekly and Daily windows are both served from the same cached daily bars.
+    # Closes are kept as float32, which is plenty for prices and halves the cache.
+
+    def __init__(self, source, max_bytes=DEFAULT_MAX_BYTES, min_history=DEFAULT_MIN_HISTORY):
+        self.source = source
+        self.max_bytes = max_bytes
+        self.min_history = min_history
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._flights = InFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _sizeof(series):
+        return int(series.memory_usage(index=True, deep=False))
+
+    def _get(self, ticker, start):
+        entry = self._entries.get(ticker)
+        if entry is None or entry[0] > start:
+            return None
+        self._entries.move_to_end(ticker)
+        return entry
+
+    def _put(self, ticker, covered_from, series, alias=None):
+        # `alias` is the proxy symbol whose closes these are, if any
+        series = series.astype(np.float32)
+        if ticker in self._entries:
+            self._nbytes -= self._sizeof(self._entries.pop(ticker)[1])
+        self._entries[ticker] = (covered_from, series, alias)
+        self._nbytes += self._sizeof(series)
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._nbytes -= self._sizeof(evicted)
+            self.evictions += 1
+
+    def get_closes(self, tickers, start, end=None):
+        # Closes for [start, end]; attrs["aliases"] maps every returned symbol that is
+        # served from a proxy's closes to that proxy.
+        end = end or datetime.now()
+        tickers = list(dict.fromkeys(tickers))
+        start_day = pd.Timestamp(start.date())
+        entries = {}
+        with self._lock:
+            missing = []
+            for ticker in tickers:
+                entry = self._get(ticker, start_day)
+                if entry is None:
+                    missing.append(ticker)
+                else:
+                    entries[ticker] = entry
+            self.hits += len(tickers) - len(missing)
+            self.misses += len(missing)
+
+        # Misses are fetched without holding the lock, so cached requests never wait
+        # on the network; a symbol another session is already fetching is waited for.
+        owned, waiting = self._flights.claim(missing)
+        if owned:
+            try:
+                fetched = self._fetch(owned, start, end)
+            except BaseException as e:
+                self._flights.resolve(owned, error=e)
+                raise
+            self._flights.resolve(owned, fetched)
+            entries.update(fetched)
+        short = []
+        for ticker, future in waiting.items():
+            entry = future.result()
+            if entry is not None and entry[0] <= start_day:
+                entries[ticker] = entry
+            elif entry is not None:
+                short.append(ticker)
+        if short:
+            # The other fetch started later than this request needs
+            entries.update(self._fetch(short, start, end))
+
+        if not entries:
+            return pd.DataFrame()
+        data = pd.DataFrame({ticker: entries[ticker][1] for ticker in tickers if ticker in entries}).sort_index()
+        data = data.loc[start_day:pd.Timestamp(end.date())]
+        data.attrs["aliases"] = {ticker: entry[2] for ticker, entry in entries.items() if entry[2]}
+        return data
+
+    def _fetch(self, tickers, start, end):
+        # {ticker: (covered_from, series, alias)} read from the source and put in the cache
+        fetch_start = min(start, end - self.min_history)
+        fetched = self.source.get_closes(tickers, fetch_start, end)
+        aliases = fetched.attrs.get("aliases", {})
+        covered_from = pd.Timestamp(fetch_start.date())
+        entries = {}
+        with self._lock:
+            for ticker in tickers:
+                if ticker in fetched.columns:
+                    series = fetched[ticker].dropna()
+                    if not series.empty:
+                        self._put(ticker, covered_from, series, aliases.get(ticker))
+                        entries[ticker] = (covered_from, series, aliases.get(ticker))
+        return entries
+
+    def refresh(self, tickers, start, end=None):
+        # Re-read the given symbols from the source (topping up the price store)
+        # and replace their cached series, without touching the hit/miss counts.
+        end = end or datetime.now()
+        self._fetch(list(dict.fromkeys(tickers)), start, end)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "tickers": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "merged": self._flights.merged,
+            }
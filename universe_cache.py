@@ -0,0 +1,76 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(float(os.environ.get("RRG_UNIVERSE_CACHE_MB", "256")) * 1024 * 1024)
+
+
+def compact_frame(data):
+    # float32 copy of a price / RRG frame on one read-only buffer, so sessions can all
+    # hold the same frame: an in-place write to it raises instead of changing the
+    # values every other session sees.
+    values = np.ascontiguousarray(data.to_numpy(dtype=np.float32))
+    values.setflags(write=False)
+    return pd.DataFrame(values, index=data.index, columns=data.columns, copy=False)
+
+
+def frame_nbytes(data):
+    if data is None:
+        return 0
+    return int(data.memory_usage(index=True, deep=False).sum())
+
+
+class UniverseCache:
+    # Loaded universes (compact close matrix plus whatever else get_data returns)
+    # shared by every session, LRU-evicted once the frames exceed `max_bytes`.
+    # Replaces st.cache_data, which pickles a private copy per entry and has no
+    # size limit, so every distinct custom ticker list grew memory for good.
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if key in self._entries:
+                self._nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_bytes
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "universes": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,156 @@
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Preset universes, sector groups and display names live in a data file, loaded once per process
+REGISTRY_PATH = os.environ.get("RRG_UNIVERSES_FILE",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)), "universes.json"))
+SYMBOL_PATTERN = re.compile(r"^\^?[A-Z0-9][A-Z0-9.\-=]*$")
+
+
+class UniverseError(Exception):
+    pass
+
+
+def _symbols(symbols, where):
+    # Upper-cased, validated, first occurrence kept; duplicates are logged and dropped
+    seen = {}
+    for symbol in symbols:
+        symbol = str(symbol).strip().upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            raise UniverseError(f"Invalid symbol {symbol!r} in {where}")
+        if symbol in seen:
+            logger.warning("Duplicate symbol %s in %s dropped", symbol, where)
+        seen.setdefault(symbol, None)
+    return list(seen)
+
+
+class UniverseRegistry:
+    # The preset universes with their members deduplicated and validated, plus a
+    # reverse index from every symbol to the (universe, sector) presets holding it.
+    # "sector_group" universes have one member per sector of a group; "sectors_of"
+    # universes take a sector and are that sector vs its members; "portfolio"
+    # universes are user ticker lists against one of the portfolio benchmarks.
+
+    def __init__(self, spec):
+        self.portfolio_benchmarks = _symbols(spec["portfolio_benchmarks"], "portfolio_benchmarks")
+        self.sector_groups = {
+            group: {
+                _symbols([sector], group)[0]: {**entry, "members": _symbols(entry["members"], f"{group} / {sector}")}
+                for sector, entry in sectors.items()
+            }
+            for group, sectors in spec["sector_groups"].items()
+        }
+        self.universes = {}
+        for universe, entry in spec["universes"].items():
+            entry = dict(entry)
+            for field in ("sector_group", "sectors_of"):
+                if field in entry and entry[field] not in self.sector_groups:
+                    raise UniverseError(f"Unknown sector group {entry[field]!r} in {universe}")
+            if "members" in entry:
+                entry["benchmark"] = _symbols([entry["benchmark"]], universe)[0]
+                entry["members"] = _symbols(entry["members"], universe)
+            self.universes[universe] = entry
+        self.portfolio_universes = [name for name, entry in self.universes.items() if entry.get("portfolio")]
+        self._index = {}
+        for key in self.presets():
+            benchmark, members, _ = self.resolve(*key)
+            for symbol in [benchmark] + members:
+                self._index.setdefault(symbol, []).append(key)
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def label(self, universe):
+        return self.universes[universe]["label"]
+
+    def sectors(self, universe):
+        # {sector: English name} for a universe with a sector selector, else {}
+        group = self.universes[universe].get("sectors_of")
+        if group is None:
+            return {}
+        return {sector: entry["name"] for sector, entry in self.sector_groups[group].items()}
+
+    def presets(self):
+        # (universe, sector) for every universe that needs no user input
+        keys = []
+        for universe, entry in self.universes.items():
+            if entry.get("sectors_of"):
+                keys += [(universe, sector) for sector in self.sector_groups[entry["sectors_of"]]]
+            elif not entry.get("portfolio"):
+                keys.append((universe, None))
+        return keys
+
+    def resolve(self, universe, sector=None, custom_tickers=None, custom_benchmark=None):
+        # (benchmark, sectors, sector_names) with fresh lists the caller may change
+        entry = self.universes.get(universe)
+        if entry is None:
+            raise UniverseError("Invalid universe selection.")
+        if "members" in entry:
+            return entry["benchmark"], list(entry["members"]), dict(entry.get("names", {}))
+        if "sector_group" in entry:
+            group = self.sector_groups[entry["sector_group"]]
+            return entry["benchmark"], list(group), {sector: group[sector]["local_name"] for sector in group}
+        if "sectors_of" in entry:
+            group = self.sector_groups[entry["sectors_of"]]
+            if not sector:
+                raise UniverseError(entry["missing_sector"])
+            if sector not in group:
+                raise UniverseError(f"Unknown sector {sector} for {universe}.")
+            members = list(group[sector]["members"])
+            return sector, members, {s: "" for s in members}
+        if custom_benchmark and custom_tickers:
+            members = list(dict.fromkeys(ticker for ticker in custom_tickers if ticker))
+            return custom_benchmark, members, {s: "" for s in members}
+        raise UniverseError(f"Please provide at least one stock ticker and select a benchmark for your {universe}.")
+
+    def universes_of(self, symbol):
+        # Preset (universe, sector) keys whose benchmark or members include `symbol`
+        return list(self._index.get(symbol.strip().upper(), []))
+
+    def fetch_plan(self, universes):
+        # The distinct symbols behind a list of (universe, sector, custom_tickers,
+        # custom_benchmark) requests, in first-seen order, for one combined download
+        symbols = {}
+        for request in universes:
+            benchmark, members, _ = self.resolve(*request)
+            symbols.update(dict.fromkeys([benchmark] + members))
+        return list(symbols)
+
+
+REGISTRY = UniverseRegistry.load()
+PORTFOLIO_UNIVERSES = REGISTRY.portfolio_universes
+PORTFOLIO_BENCHMARKS = REGISTRY.portfolio_benchmarks
+SECTOR_UNIVERSES = {group: {sector: entry["members"] for sector, entry in sectors.items()}
+                    for group, sectors in REGISTRY.sector_groups.items()}
+
+
+def resolve_universe(universe, sector=None, custom_tickers=None, custom_benchmark=None):
+    return REGISTRY.resolve(universe, sector, custom_tickers, custom_benchmark)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the universe registry")
+    parser.add_argument("symbols", nargs="*", help="show the preset universes containing these symbols")
+    args = parser.parse_args(argv)
+
+    if args.symbols:
+        for symbol in args.symbols:
+            keys = REGISTRY.universes_of(symbol)
+            print(f"{symbol}: " + (", ".join(f"{u} / {s}" if s else u for u, s in keys) or "in no preset universe"))
+        return 0
+    presets = [key + (None, None) for key in REGISTRY.presets()]
+    listed = sum(len(REGISTRY.resolve(*request)[1]) + 1 for request in presets)
+    print(f"{len(presets)} preset universes, {listed} listed symbols, {len(REGISTRY.fetch_plan(presets))} to fetch")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())